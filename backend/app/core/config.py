@@ -14,10 +14,54 @@ MINIO_PUBLIC_ENDPOINT = getenv("MINIO_PUBLIC_ENDPOINT", MINIO_ENDPOINT)
 MINIO_ACCESS_KEY = getenv("MINIO_ACCESS_KEY", "minioadmin")
 MINIO_SECRET_KEY = getenv("MINIO_SECRET_KEY", "minioadminpass")
 MINIO_BUCKET = getenv("MINIO_BUCKET", "media")
+S3_MAX_POOL_CONNECTIONS = int(getenv("S3_MAX_POOL_CONNECTIONS", "50") or "50")
+S3_EXECUTOR_WORKERS = int(getenv("S3_EXECUTOR_WORKERS", "32") or "32")
+MEDIA_STREAM_CHUNK_SIZE = int(getenv("MEDIA_STREAM_CHUNK_KB", "256") or "256") * 1024
+# Optional local disk cache in front of MinIO for serve_media; disabled when MEDIA_CACHE_DIR is empty.
+MEDIA_CACHE_DIR = getenv("MEDIA_CACHE_DIR", "")
+MEDIA_CACHE_MAX_BYTES = int(getenv("MEDIA_CACHE_MAX_MB", "1024") or "1024") * 1024 * 1024
+MEDIA_CACHE_MAX_OBJECT_BYTES = int(getenv("MEDIA_CACHE_MAX_OBJECT_MB", "16") or "16") * 1024 * 1024
+UPLOAD_PART_SIZE = max(5, int(getenv("UPLOAD_PART_SIZE_MB", "8") or "8")) * 1024 * 1024
+MEDIA_MAX_IMAGE_BYTES = int(getenv("MEDIA_MAX_IMAGE_MB", "20") or "20") * 1024 * 1024
+MEDIA_MAX_VIDEO_BYTES = int(getenv("MEDIA_MAX_VIDEO_MB", "500") or "500") * 1024 * 1024
+# Per content type overrides in MB, e.g. "image/gif=10,video/quicktime=1024".
+MEDIA_SIZE_LIMITS = {
+    content_type.strip(): int(float(mb) * 1024 * 1024)
+    for content_type, mb in (
+        item.split("=", 1) for item in (getenv("MEDIA_SIZE_LIMITS_MB", "") or "").split(",") if "=" in item
+    )
+}
+PRESIGN_EXPIRES_SECONDS = int(getenv("PRESIGN_EXPIRES_SECONDS", "3600") or "3600")
+PRESIGN_REFRESH_MARGIN_SECONDS = int(getenv("PRESIGN_REFRESH_MARGIN_SECONDS", "300") or "300")
+PRESIGN_CACHE_SIZE = int(getenv("PRESIGN_CACHE_SIZE", "50000") or "50000")
 
 JWT_SECRET = getenv("JWT_SECRET", "change-me")
 JWT_EXPIRE_MINUTES = int(getenv("JWT_EXPIRE_MINUTES", "1440") or "1440")
+# pbkdf2_sha256 rounds for new hashes; existing hashes are upgraded on the next successful login.
+PASSWORD_HASH_ROUNDS = int(getenv("PASSWORD_HASH_ROUNDS", "29000") or "29000")
+# Hashing runs in its own process pool so login storms cannot occupy the threadpool sync routes use;
+# 0 hashes on that threadpool instead, which is only useful as a benchmark baseline.
+PASSWORD_HASH_WORKERS = int(getenv("PASSWORD_HASH_WORKERS", "2") or "2")
+USER_CACHE_SIZE = int(getenv("USER_CACHE_SIZE", "10000") or "10000")
+USER_CACHE_TTL_SECONDS = float(getenv("USER_CACHE_TTL_SECONDS", "60") or "60")
+AUTHOR_CACHE_SIZE = int(getenv("AUTHOR_CACHE_SIZE", "50000") or "50000")
+AUTHOR_CACHE_TTL_SECONDS = float(getenv("AUTHOR_CACHE_TTL_SECONDS", "300") or "300")
+MEMBERSHIP_CACHE_SIZE = int(getenv("MEMBERSHIP_CACHE_SIZE", "10000") or "10000")
+# Bounds how long a join or leave made through another worker stays invisible to this one's feed.
+MEMBERSHIP_CACHE_TTL_SECONDS = float(getenv("MEMBERSHIP_CACHE_TTL_SECONDS", "15") or "15")
+POST_COMMUNITY_CACHE_SIZE = int(getenv("POST_COMMUNITY_CACHE_SIZE", "100000") or "100000")
+POST_COMMUNITY_CACHE_TTL_SECONDS = float(getenv("POST_COMMUNITY_CACHE_TTL_SECONDS", "3600") or "3600")
+
+MAX_PAGE_SIZE = int(getenv("MAX_PAGE_SIZE", "100") or "100")
+BULK_MAX_ITEMS = int(getenv("BULK_MAX_ITEMS", "5000") or "5000")
+# Deepest rank a search section pages to; bounds the top-k textScore sort at offset + limit.
+SEARCH_MAX_OFFSET = int(getenv("SEARCH_MAX_OFFSET", "1000") or "1000")
+COMMUNITY_INDEX_REFRESH_SECONDS = float(getenv("COMMUNITY_INDEX_REFRESH_SECONDS", "30") or "30")
 
 EVENT_LOG_DIR = getenv("EVENT_LOG_DIR", "/datalake/events")
+EVENT_QUEUE_SIZE = int(getenv("EVENT_QUEUE_SIZE", "10000") or "10000")
+EVENT_BATCH_SIZE = int(getenv("EVENT_BATCH_SIZE", "256") or "256")
+EVENT_FLUSH_SECONDS = float(getenv("EVENT_FLUSH_SECONDS", "1.0") or "1.0")
+EVENT_FSYNC = (getenv("EVENT_FSYNC", "never") or "never").lower()  # "never" or "batch"
 RESET_DB_ON_STARTUP = (getenv("RESET_DB_ON_STARTUP", "true" if APP_ENV == "dev" else "false") or "false").lower() in {"1", "true", "yes"}
 
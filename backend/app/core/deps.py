@@ -1,14 +1,29 @@
+import hashlib
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlmodel import Session, select
 
+from app.core.cache import TTLCache
+from app.core.config import USER_CACHE_SIZE, USER_CACHE_TTL_SECONDS
 from app.core.security import decode_token
 from app.db.postgres import get_session
 from app.db.models import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# token digest -> (claims, User snapshot). Entries never outlive the token's exp.
+_user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+
+def invalidate_user(user_id: int) -> None:
+    _user_cache.evict_where(lambda _, value: value[1]["id"] == user_id)
+
 def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)) -> User:
+    digest = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    cached = _user_cache.get(digest)
+    if cached is not None:
+        return User(**cached[1])
+
     payload = decode_token(token)
     if not payload or "sub" not in payload:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
@@ -17,4 +32,5 @@ def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Dep
     user = session.exec(select(User).where(User.id == user_id)).first()
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
\ No newline at end of file
+    _user_cache.set(digest, (payload, user.model_dump()), expires_at=payload.get("exp"))
+    return user
@@ -1,11 +1,24 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, Tuple
 import jwt
 from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
 
-from app.core.config import JWT_SECRET, JWT_EXPIRE_MINUTES
+from app.core.config import JWT_SECRET, JWT_EXPIRE_MINUTES, PASSWORD_HASH_ROUNDS, PASSWORD_HASH_WORKERS
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=PASSWORD_HASH_ROUNDS,
+    # Hashes outside these bounds are flagged by verify_and_update and re-hashed on login.
+    pbkdf2_sha256__min_rounds=PASSWORD_HASH_ROUNDS,
+    pbkdf2_sha256__max_rounds=PASSWORD_HASH_ROUNDS,
+)
+
+_hash_pool: Optional[ProcessPoolExecutor] = None
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -13,6 +26,38 @@ def hash_password(password: str) -> str:
 def verify_password(password: str, password_hash: str) -> bool:
     return pwd_context.verify(password, password_hash)
 
+def verify_and_update_password(password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+    """Verify, and return a re-hash when the stored hash uses other rounds than PASSWORD_HASH_ROUNDS."""
+    return pwd_context.verify_and_update(password, password_hash)
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    if _hash_pool is None:
+        # spawn, not fork: the API process holds DB pools and threads that must not be copied.
+        _hash_pool = ProcessPoolExecutor(
+            max_workers=PASSWORD_HASH_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _hash_pool
+
+async def _run_hash(func, *args):
+    if PASSWORD_HASH_WORKERS <= 0:
+        # PASSWORD_HASH_WORKERS=0: hash on the threadpool the sync routes share (the baseline
+        # scripts/bench_login.py compares against).
+        return await run_in_threadpool(func, *args)
+    return await asyncio.get_running_loop().run_in_executor(_get_hash_pool(), func, *args)
+
+async def hash_password_async(password: str) -> str:
+    return await _run_hash(hash_password, password)
+
+async def verify_and_update_password_async(password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+    return await _run_hash(verify_and_update_password, password, password_hash)
+
+def shutdown_hash_pool() -> None:
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(cancel_futures=True)
+        _hash_pool = None
+
 def create_access_token(subject: str) -> str:
     now = datetime.now(timezone.utc)
     exp = now + timedelta(minutes=JWT_EXPIRE_MINUTES)
@@ -1,5 +1,11 @@
+from typing import Any
+
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+
 from app.core.config import MONGO_URL, MONGO_DB
+from app.services.metrics import MongoCommandMetrics, MongoPoolMetrics
+from app.services.pagination import in_chunks
 
 if not MONGO_URL:
     raise RuntimeError("MONGO_URL env var is required")
@@ -9,9 +15,152 @@ _client: AsyncIOMotorClient | None = None
 def get_client() -> AsyncIOMotorClient:
     global _client
     if _client is None:
-        _client = AsyncIOMotorClient(MONGO_URL)
+        _client = AsyncIOMotorClient(MONGO_URL, event_listeners=[MongoCommandMetrics(), MongoPoolMetrics()])
     return _client
 
 def get_db():
     client = get_client()
-    return client[MONGO_DB]
\ No newline at end of file
+    return client[MONGO_DB]
+
+
+# Indexes each router relies on, keyed by collection. Built on startup by ensure_indexes().
+INDEXES: dict[str, list[IndexModel]] = {
+    "posts": [
+        IndexModel([("post_id", ASCENDING)], name="post_id_unique", unique=True),
+        IndexModel(
+            [("community_id", ASCENDING), ("created_at", DESCENDING), ("post_id", DESCENDING)],
+            name="community_created_at_post_id",
+        ),
+        IndexModel(
+            [("community_id", ASCENDING), ("hot_rank", DESCENDING), ("post_id", DESCENDING)],
+            name="community_hot_rank_post_id",
+        ),
+        IndexModel(
+            [("community_id", ASCENDING), ("score", DESCENDING), ("post_id", DESCENDING)],
+            name="community_score_post_id",
+        ),
+        # A collection holds one text index. community_id is a suffix, not a prefix: a prefix would make
+        # it mandatory in every $text query, while a suffix lets a community filter drop other
+        # communities' matches from the index keys without fetching them.
+        IndexModel(
+            [("title", TEXT), ("body", TEXT), ("community_id", ASCENDING)],
+            name="post_text_community",
+            weights={"title": 5, "body": 1},
+        ),
+    ],
+    "comments": [
+        IndexModel([("comment_id", ASCENDING)], name="comment_id_unique", unique=True),
+        IndexModel(
+            [("post_id", ASCENDING), ("created_at", ASCENDING), ("comment_id", ASCENDING)],
+            name="post_created_at_comment_id",
+        ),
+        IndexModel([("post_id", ASCENDING), ("path", ASCENDING), ("depth", ASCENDING)], name="post_path_depth"),
+        IndexModel([("body", TEXT), ("community_id", ASCENDING)], name="comment_text_community"),
+    ],
+    "votes": [
+        IndexModel(
+            [("target_type", ASCENDING), ("target_id", ASCENDING), ("user_id", ASCENDING)],
+            name="target_user_unique",
+            unique=True,
+        ),
+    ],
+}
+
+# Indexes replaced by the ones above; dropped on startup so their replacements can be built.
+RETIRED_INDEXES: dict[str, list[str]] = {
+    "posts": ["post_text", "community_post_text"],
+    "comments": ["comment_text", "community_comment_text"],
+}
+
+# Representative shape of every query the routers issue: (name, collection, filter, sort).
+ROUTER_QUERIES: list[tuple[str, str, dict[str, Any], list[tuple[str, int]] | None]] = [
+    ("posts.list_posts", "posts", {"community_id": 0}, [("created_at", DESCENDING), ("post_id", DESCENDING)]),
+    (
+        "posts.list_posts[cursor]",
+        "posts",
+        {
+            "community_id": 0,
+            "created_at": {"$lte": ""},
+            "$or": [{"created_at": {"$lt": ""}}, {"created_at": "", "post_id": {"$lt": ""}}],
+        },
+        [("created_at", DESCENDING), ("post_id", DESCENDING)],
+    ),
+    ("posts.list_posts[hot]", "posts", {"community_id": 0}, [("hot_rank", DESCENDING), ("post_id", DESCENDING)]),
+    ("posts.list_posts[top]", "posts", {"community_id": 0}, [("score", DESCENDING), ("post_id", DESCENDING)]),
+    # A member of 450 communities: fetch_page_in issues one query per $in chunk.
+    *(
+        (
+            f"posts.home_feed[chunk {i}]",
+            "posts",
+            {"community_id": {"$in": chunk}},
+            [("created_at", DESCENDING), ("post_id", DESCENDING)],
+        )
+        for i, chunk in enumerate(in_chunks(list(range(450))))
+    ),
+    ("posts.get_post", "posts", {"post_id": ""}, None),
+    ("comments.add_comment", "posts", {"post_id": ""}, None),
+    ("comments.list_comments", "comments", {"post_id": ""}, [("created_at", ASCENDING), ("comment_id", ASCENDING)]),
+    (
+        "comments.list_comments[cursor]",
+        "comments",
+        {
+            "post_id": "",
+            "created_at": {"$gte": ""},
+            "$or": [{"created_at": {"$gt": ""}}, {"created_at": "", "comment_id": {"$gt": ""}}],
+        },
+        [("created_at", ASCENDING), ("comment_id", ASCENDING)],
+    ),
+    ("comments.preview_comments", "comments", {"post_id": {"$in": ["", "~"]}}, None),
+    (
+        "comments.comment_tree",
+        "comments",
+        {"post_id": "", "path": {"$gte": "", "$lt": "~"}, "depth": {"$lte": 5}},
+        [("path", ASCENDING)],
+    ),
+    ("comments.add_comment[parent]", "comments", {"comment_id": "", "post_id": ""}, None),
+    ("search.posts", "posts", {"$text": {"$search": "x"}}, None),
+    ("search.posts[community]", "posts", {"$text": {"$search": "x"}, "community_id": 0}, None),
+    ("search.comments", "comments", {"$text": {"$search": "x"}}, None),
+    ("search.comments[community]", "comments", {"$text": {"$search": "x"}, "community_id": 0}, None),
+    ("votes.vote", "votes", {"target_type": "post", "target_id": "", "user_id": 0}, None),
+    ("votes.vote_comment", "comments", {"comment_id": ""}, None),
+]
+
+
+async def ensure_indexes() -> None:
+    db = get_db()
+    for collection, indexes in INDEXES.items():
+        existing = await db[collection].index_information()
+        for name in RETIRED_INDEXES.get(collection, []):
+            if name in existing:
+                await db[collection].drop_index(name)
+        await db[collection].create_indexes(indexes)
+
+
+def _plan_stages(plan: Any):
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _plan_stages(item)
+
+
+async def find_plan_problems() -> dict[str, str]:
+    """Router queries whose winning plan scans the collection or sorts in memory, with the stage."""
+    db = get_db()
+    problems = {}
+    for name, collection, query, sort in ROUTER_QUERIES:
+        cursor = db[collection].find(query).limit(1)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        stages = set(_plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {})))
+        if "COLLSCAN" in stages:
+            problems[name] = "COLLSCAN"
+        elif sort and "SORT" in stages:
+            problems[name] = "SORT"
+    return problems
+
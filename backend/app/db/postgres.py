@@ -1,10 +1,27 @@
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
 from app.core.config import DATABASE_URL, RESET_DB_ON_STARTUP
+from app.services.metrics import instrument_engine
 
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL env var is required")
 
+
+def _async_url(url: str) -> str:
+    scheme, rest = url.split("://", 1)
+    dialect = scheme.split("+", 1)[0]
+    driver = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}.get(dialect)
+    if not driver:
+        raise RuntimeError(f"No async driver configured for {dialect}")
+    return f"{dialect}+{driver}://{rest}"
+
+
 engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+async_engine = create_async_engine(_async_url(DATABASE_URL), pool_pre_ping=True)
+instrument_engine(engine, "sync")
+instrument_engine(async_engine.sync_engine, "async")
 
 
 def create_tables() -> None:
@@ -16,3 +33,8 @@ def create_tables() -> None:
 def get_session():
     with Session(engine) as session:
         yield session
+
+
+async def get_async_session():
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
@@ -1,20 +1,28 @@
 import asyncio
 import logging
+import time
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.exc import OperationalError
 from sqlmodel import Session
 
 from sqlmodel import Session
 
-from app.db.postgres import create_tables, engine
+from app.core.security import shutdown_hash_pool
+from app.db.mongo import ensure_indexes
+from app.db.postgres import async_engine, create_tables, engine
 from app.routers.auth import router as auth_router
 from app.routers.communities import router as communities_router
 from app.routers.posts import router as posts_router
 from app.routers.comments import router as comments_router
 from app.routers.media import router as media_router
+from app.routers.metrics import router as metrics_router
+from app.routers.search import router as search_router
 from app.routers.users import router as users_router
+from app.routers.votes import router as votes_router
+from app.services.events import shutdown_event_writer
+from app.services.metrics import observe_request
 from app.services.seed import seed_demo_data
 
 app = FastAPI(title="Reddit Big Data MVP", version="0.1.0")
@@ -32,6 +40,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        observe_request(request.method, getattr(route, "path", "unmatched"), status, time.perf_counter() - start)
+
 async def init_postgres_with_retry() -> None:
     delay_seconds = 1
     while True:
@@ -53,15 +74,26 @@ async def init_postgres_with_retry() -> None:
 @app.on_event("startup")
 async def on_startup():
     create_tables()
+    await ensure_indexes()
     with Session(engine) as session:
         await seed_demo_data(session)
 
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    shutdown_event_writer()
+    shutdown_hash_pool()
+    await async_engine.dispose()
+
 app.include_router(auth_router)
 app.include_router(communities_router)
 app.include_router(posts_router)
 app.include_router(comments_router)
 app.include_router(media_router)
 app.include_router(users_router)
+app.include_router(votes_router)
+app.include_router(search_router)
+app.include_router(metrics_router)
 
 @app.get("/", tags=["health"])
 def root():
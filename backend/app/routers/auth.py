@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, EmailStr
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core.security import hash_password, verify_password, create_access_token
-from app.db.postgres import get_session
+from app.core.security import create_access_token, hash_password_async, verify_and_update_password_async
+from app.db.postgres import get_async_session
 from app.db.models import User
 from app.services.events import log_event
 
@@ -23,11 +24,11 @@ class TokenOut(BaseModel):
     token_type: str = "bearer"
 
 @router.post("/register", response_model=dict)
-def register(data: RegisterIn, session: Session = Depends(get_session)):
-    existing = session.exec(select(User).where(User.username == data.username)).first()
+async def register(data: RegisterIn, session: AsyncSession = Depends(get_async_session)):
+    existing = (await session.exec(select(User).where(User.username == data.username))).first()
     if existing:
         raise HTTPException(status_code=400, detail="Username already exists")
-    existing_email = session.exec(select(User).where(User.email == data.email)).first()
+    existing_email = (await session.exec(select(User).where(User.email == data.email))).first()
     if existing_email:
         raise HTTPException(status_code=400, detail="Email already exists")
 
@@ -35,20 +36,27 @@ def register(data: RegisterIn, session: Session = Depends(get_session)):
         username=data.username,
         email=data.email,
         display_name=data.username,
-        password_hash=hash_password(data.password),
+        password_hash=await hash_password_async(data.password),
     )
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
 
     log_event("user_register", user.id, {"username": user.username})
     return {"id": user.id, "username": user.username, "email": user.email}
 
 @router.post("/login", response_model=TokenOut)
-def login(data: LoginIn, session: Session = Depends(get_session)):
-    user = session.exec(select(User).where(User.username == data.username)).first()
-    if not user or not verify_password(data.password, user.password_hash):
+async def login(data: LoginIn, session: AsyncSession = Depends(get_async_session)):
+    user = (await session.exec(select(User).where(User.username == data.username))).first()
+    if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    valid, new_hash = await verify_and_update_password_async(data.password, user.password_hash)
+    if not valid:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    if new_hash:
+        user.password_hash = new_hash
+        session.add(user)
+        await session.commit()
 
     token = create_access_token(str(user.id))
     log_event("user_login", user.id, {"username": user.username})
@@ -1,70 +1,255 @@
 import uuid
-from datetime import datetime, timezone
-from typing import Optional
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
-from sqlmodel import Session, select
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.core.config import BULK_MAX_ITEMS, MAX_PAGE_SIZE
 from app.core.deps import get_current_user
-from app.db.postgres import get_session
+from app.db.postgres import get_async_session
 from app.db.mongo import get_db
-from app.db.models import CommunityMembership, User
-from app.services.events import log_event
+from app.db.models import User
+from app.services.authors import attach_authors, remember_author
+from app.services.events import log_event, log_events
+from app.services.memberships import is_member, post_community_id, post_community_ids
+from app.services.pagination import decode_cursor, encode_cursor, fetch_page
+from app.services.threads import PATH_RANGE_END, PATH_SEPARATOR, build_tree, child_path, path_depth
 
 router = APIRouter(tags=["comments"])
 
+# Replies extend the parent's path; comments from before threading have none until scripts.backfill runs.
+PATHLESS_PARENT_DETAIL = "Parent comment predates threading and cannot take replies until it is backfilled"
+
 class CommentIn(BaseModel):
     post_id: str
     body: str
     parent_comment_id: Optional[str] = None
 
-@router.post("/comments", response_model=dict)
-async def add_comment(
-    data: CommentIn,
-    session: Session = Depends(get_session),
-    me: User = Depends(get_current_user),
-):
-    db = get_db()
-    post = await db.posts.find_one({"post_id": data.post_id})
-    if not post:
-        raise HTTPException(status_code=404, detail="Post not found")
-    community_id = post.get("community_id")
-    if not community_id:
-        raise HTTPException(status_code=400, detail="Post community missing")
-
-    membership = session.exec(
-        select(CommunityMembership).where(
-            CommunityMembership.user_id == me.id,
-            CommunityMembership.community_id == community_id,
-        )
-    ).first()
-    if not membership:
-        raise HTTPException(status_code=403, detail="Join the community to comment.")
+class CommentPreviewIn(BaseModel):
+    post_ids: List[str] = Field(..., max_length=MAX_PAGE_SIZE)
+    limit: int = Field(3, ge=0, le=20)
+
+class CommentBulkIn(BaseModel):
+    items: List[CommentIn] = Field(..., min_length=1, max_length=BULK_MAX_ITEMS)
 
+def _new_comment_doc(
+    data: CommentIn, me: User, community_id: int, parent_path: Optional[str], created_at: datetime
+) -> dict:
     comment_id = str(uuid.uuid4())
-    doc = {
+    path = child_path(parent_path, created_at, comment_id)
+    return {
         "comment_id": comment_id,
         "post_id": data.post_id,
+        "community_id": community_id,
         "parent_comment_id": data.parent_comment_id,
         "author_user_id": me.id,
+        "author_username": me.username,
+        "author_display_name": me.display_name,
         "body": data.body,
-        "created_at": datetime.now(timezone.utc).isoformat(),
+        "created_at": created_at.isoformat(),
         "score": 0,
+        "path": path,
+        "depth": path_depth(path),
+        "reply_count": 0,
     }
+
+@router.post("/comments", response_model=dict)
+async def add_comment(
+    data: CommentIn,
+    session: AsyncSession = Depends(get_async_session),
+    me: User = Depends(get_current_user),
+):
+    db = get_db()
+    community_id = await post_community_id(data.post_id)
+    if community_id is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+    if not await is_member(me.id, community_id, session):
+        raise HTTPException(status_code=403, detail="Join the community to comment.")
+
+    parent_path = None
+    if data.parent_comment_id:
+        parent = await db.comments.find_one(
+            {"comment_id": data.parent_comment_id, "post_id": data.post_id}, {"_id": 0, "comment_id": 1, "path": 1}
+        )
+        if not parent:
+            raise HTTPException(status_code=404, detail="Parent comment not found")
+        if not parent.get("path"):
+            raise HTTPException(status_code=409, detail=PATHLESS_PARENT_DETAIL)
+        parent_path = parent["path"]
+
+    doc = _new_comment_doc(data, me, community_id, parent_path, datetime.now(timezone.utc))
+    comment_id = doc["comment_id"]
     await db.comments.insert_one(doc)
+    if data.parent_comment_id:
+        await db.comments.update_one({"comment_id": data.parent_comment_id}, {"$inc": {"reply_count": 1}})
 
     await db.posts.update_one({"post_id": data.post_id}, {"$inc": {"num_comments": 1}})
+    remember_author(me)
 
     log_event("comment_create", me.id, {"comment_id": comment_id, "post_id": data.post_id, "is_reply": bool(data.parent_comment_id)})
     doc.pop("_id", None)
     return doc
 
-@router.get("/posts/{post_id}/comments", response_model=list[dict])
-async def list_comments(post_id: str, limit: int = 50, skip: int = 0):
+@router.post("/comments/bulk", response_model=dict)
+async def add_comments_bulk(
+    data: CommentBulkIn,
+    session: AsyncSession = Depends(get_async_session),
+    me: User = Depends(get_current_user),
+):
+    """Insert many comments: posts, parents and memberships are resolved once per distinct id,
+    comments go in with one unordered insert_many and the post/parent counters with one bulk_write each.
+
+    Parents must already exist. Items keep their input order (created_at steps by 1µs), and
+    `results[i]` reports item i as {"ok": true, "comment_id"} or {"ok": false, "error"}.
+    """
+    db = get_db()
+    post_communities = await post_community_ids(item.post_id for item in data.items)
+    allowed = {cid for cid in set(post_communities.values()) if await is_member(me.id, cid, session)}
+    parent_ids = list({item.parent_comment_id for item in data.items if item.parent_comment_id})
+    parents = {}
+    if parent_ids:
+        cursor = db.comments.find(
+            {"comment_id": {"$in": parent_ids}}, {"_id": 0, "comment_id": 1, "post_id": 1, "path": 1}
+        )
+        parents = {parent["comment_id"]: parent async for parent in cursor}
+
+    results: List[dict] = [{}] * len(data.items)
+    docs, doc_items = [], []
+    base = datetime.now(timezone.utc)
+    for i, item in enumerate(data.items):
+        community_id = post_communities.get(item.post_id)
+        parent = parents.get(item.parent_comment_id) if item.parent_comment_id else None
+        if community_id is None:
+            results[i] = {"ok": False, "error": "Post not found"}
+        elif community_id not in allowed:
+            results[i] = {"ok": False, "error": "Join the community to comment."}
+        elif item.parent_comment_id and (parent is None or parent["post_id"] != item.post_id):
+            results[i] = {"ok": False, "error": "Parent comment not found"}
+        elif parent is not None and not parent.get("path"):
+            results[i] = {"ok": False, "error": PATHLESS_PARENT_DETAIL}
+        else:
+            created_at = base + timedelta(microseconds=i)
+            docs.append(_new_comment_doc(item, me, community_id, parent["path"] if parent else None, created_at))
+            doc_items.append(i)
+
+    failed = {}
+    if docs:
+        try:
+            await db.comments.insert_many(docs, ordered=False)
+        except BulkWriteError as exc:
+            failed = {err["index"]: err.get("errmsg", "Write failed") for err in exc.details.get("writeErrors", [])}
+
+    comment_counts: Counter = Counter()
+    reply_counts: Counter = Counter()
+    events = []
+    for n, (i, doc) in enumerate(zip(doc_items, docs)):
+        if n in failed:
+            results[i] = {"ok": False, "error": failed[n]}
+            continue
+        results[i] = {"ok": True, "comment_id": doc["comment_id"]}
+        comment_counts[doc["post_id"]] += 1
+        if doc["parent_comment_id"]:
+            reply_counts[doc["parent_comment_id"]] += 1
+        events.append({"comment_id": doc["comment_id"], "post_id": doc["post_id"], "is_reply": bool(doc["parent_comment_id"]), "bulk": True})
+
+    if comment_counts:
+        await db.posts.bulk_write(
+            [UpdateOne({"post_id": post_id}, {"$inc": {"num_comments": n}}) for post_id, n in comment_counts.items()],
+            ordered=False,
+        )
+    if reply_counts:
+        await db.comments.bulk_write(
+            [UpdateOne({"comment_id": cid}, {"$inc": {"reply_count": n}}) for cid, n in reply_counts.items()],
+            ordered=False,
+        )
+    if events:
+        remember_author(me)
+    log_events("comment_create", me.id, events)
+    return {"inserted": len(events), "failed": len(results) - len(events), "results": results}
+
+@router.post("/posts/comments/preview", response_model=dict)
+async def preview_comments(data: CommentPreviewIn, session: AsyncSession = Depends(get_async_session)):
+    """First `limit` comments and the total comment count for each post, in one aggregation."""
+    post_ids = list(dict.fromkeys(data.post_ids))
     db = get_db()
-    cursor = db.comments.find({"post_id": post_id}).sort("created_at", 1).skip(skip).limit(limit)
-    comments = await cursor.to_list(length=limit)
-    for c in comments:
-        c.pop("_id", None)
-    return comments
+    group_stage = {"_id": "$post_id", "count": {"$sum": 1}}
+    pipeline = [{"$match": {"post_id": {"$in": post_ids}}}, {"$group": group_stage}]
+    # $topN keeps at most `limit` comments per post while grouping, however busy the post is.
+    # It rejects n=0, so a counts-only request (limit=0) groups without it.
+    if data.limit:
+        group_stage["comments"] = {
+            "$topN": {"n": data.limit, "sortBy": {"created_at": 1, "comment_id": 1}, "output": "$$ROOT"}
+        }
+        pipeline.append({"$project": {"comments._id": 0}})
+    groups = await db.comments.aggregate(pipeline).to_list(length=len(post_ids))
+    by_post = {group["_id"]: group for group in groups}
+    await attach_authors([comment for group in groups for comment in group.get("comments", [])], session)
+    return {
+        "items": {
+            post_id: {
+                "count": by_post[post_id]["count"] if post_id in by_post else 0,
+                "comments": by_post[post_id].get("comments", []) if post_id in by_post else [],
+            }
+            for post_id in post_ids
+        }
+    }
+
+@router.get("/posts/{post_id}/comments", response_model=dict)
+async def list_comments(
+    post_id: str,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_session),
+):
+    db = get_db()
+    comments, next_cursor = await fetch_page(db.comments, {"post_id": post_id}, "comment_id", limit, cursor)
+    await attach_authors(comments, session)
+    return {"items": comments, "next_cursor": next_cursor}
+
+
+@router.get("/posts/{post_id}/comments/tree", response_model=dict)
+async def comment_tree(
+    post_id: str,
+    parent_comment_id: Optional[str] = None,
+    max_depth: int = Query(5, ge=0, le=50),
+    limit: int = Query(200, ge=1, le=MAX_PAGE_SIZE * 5),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Nested comments of a post, or the subtree under parent_comment_id, in one path range scan.
+
+    max_depth is relative to the returned roots; nodes cut off there carry has_more_replies,
+    which the client follows by requesting the subtree under that comment. next_cursor
+    continues the same traversal when limit is reached.
+    """
+    db = get_db()
+    lower, upper, base_depth = "", PATH_RANGE_END, 0
+    if parent_comment_id:
+        parent = await db.comments.find_one({"comment_id": parent_comment_id, "post_id": post_id}, {"_id": 0, "path": 1})
+        if not parent or not parent.get("path"):
+            raise HTTPException(status_code=404, detail="Comment not found")
+        lower = parent["path"] + PATH_SEPARATOR
+        upper = lower + PATH_RANGE_END
+        base_depth = path_depth(parent["path"]) + 1
+    if cursor:
+        last_path, _ = decode_cursor(cursor, "path")
+        if not isinstance(last_path, str) or not lower <= last_path < upper:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        path_range = {"$gt": last_path, "$lt": upper}
+    else:
+        path_range = {"$gte": lower, "$lt": upper}
+
+    query = {"post_id": post_id, "path": path_range, "depth": {"$lte": base_depth + max_depth}}
+    comments = await db.comments.find(query, {"_id": 0}).sort("path", 1).limit(limit + 1).to_list(length=limit + 1)
+
+    next_cursor = None
+    if len(comments) > limit:
+        comments = comments[:limit]
+        next_cursor = encode_cursor("path", comments[-1]["path"], comments[-1]["comment_id"])
+    await attach_authors(comments, session)
+    return {"items": build_tree(comments, base_depth + max_depth), "next_cursor": next_cursor}
@@ -1,14 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException
+import uuid
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
 from pydantic import BaseModel
 from sqlmodel import Session, select
 
+from app.core.config import MAX_PAGE_SIZE
 from app.core.deps import get_current_user
 from app.db.models import Community, CommunityMembership, User
 from app.db.postgres import get_session
+from app.services.community_index import community_index
 from app.services.events import log_event
+from app.services.pagination import decode_cursor, encode_cursor
+from app.services.memberships import add_membership, remove_membership
 
 router = APIRouter(prefix="/communities", tags=["communities"])
 
+# Index versions are per process; the instance id keeps ETags from matching across workers.
+_INDEX_INSTANCE = uuid.uuid4().hex[:12]
+
 class CommunityIn(BaseModel):
     name: str
     description: str = ""
@@ -31,27 +41,69 @@ def create_community(
     session.add(c)
     session.commit()
     session.refresh(c)
+    community_index.upsert(c)
 
     membership = CommunityMembership(user_id=me.id, community_id=c.id)
     session.add(membership)
     session.commit()
+    add_membership(me.id, c.id)
 
     log_event("community_create", me.id, {"community_id": c.id, "name": c.name})
     return {"id": c.id, "name": c.name, "description": c.description, "created_by_user_id": c.created_by_user_id}
 
+def _index_etag() -> str:
+    return f'W/"communities-{_INDEX_INSTANCE}-{community_index.version}"'
+
+def _not_modified(if_none_match: Optional[str], response: Response) -> Optional[Response]:
+    etag = _index_etag()
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
+
 @router.get("", response_model=list[dict])
-def list_communities(session: Session = Depends(get_session)):
-    communities = session.exec(select(Community).order_by(Community.created_at.desc())).all()
-    return [
-        {
-            "id": c.id,
-            "name": c.name,
-            "description": c.description,
-            "created_by_user_id": c.created_by_user_id,
-            "created_at": c.created_at,
-        }
-        for c in communities
-    ]
+def list_communities(
+    response: Response,
+    session: Session = Depends(get_session),
+    if_none_match: Optional[str] = Header(None),
+):
+    community_index.ensure_fresh(session)
+    return _not_modified(if_none_match, response) or community_index.newest_first()
+
+@router.get("/directory", response_model=dict)
+def community_directory(
+    response: Response,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    session: Session = Depends(get_session),
+    if_none_match: Optional[str] = Header(None),
+):
+    """Communities in name order, paged from the in-memory index; `version` changes on any edit."""
+    community_index.ensure_fresh(session)
+    after = None
+    if cursor:
+        name, community_id = decode_cursor(cursor, "name")
+        if not isinstance(name, str) or not community_id.isdigit():
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        after = (name, int(community_id))
+    not_modified = _not_modified(if_none_match, response)
+    if not_modified:
+        return not_modified
+    items, has_more = community_index.page(limit, after)
+    next_cursor = None
+    if has_more:
+        last = items[-1]
+        next_cursor = encode_cursor("name", last["name"].lower(), str(last["id"]))
+    return {"items": items, "next_cursor": next_cursor, "version": community_index.version}
+
+@router.get("/search", response_model=dict)
+def search_communities(
+    prefix: str = Query(..., min_length=1, max_length=80),
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    session: Session = Depends(get_session),
+):
+    community_index.ensure_fresh(session)
+    return {"items": community_index.search(prefix.strip(), limit), "version": community_index.version}
 
 
 @router.patch("/{community_id}", response_model=dict)
@@ -83,6 +135,7 @@ def update_community(
     session.add(community)
     session.commit()
     session.refresh(community)
+    community_index.upsert(community)
 
     log_event("community_update", me.id, {"community_id": community.id})
     return {
@@ -117,6 +170,7 @@ def join_community(
     session.add(membership)
     session.commit()
     session.refresh(membership)
+    add_membership(me.id, community_id)
 
     log_event("community_join", me.id, {"community_id": community_id})
     return {"status": "joined"}
@@ -139,6 +193,7 @@ def leave_community(
 
     session.delete(membership)
     session.commit()
+    remove_membership(me.id, community_id)
 
     log_event("community_leave", me.id, {"community_id": community_id})
     return {"status": "left"}
@@ -1,14 +1,43 @@
+import asyncio
 import uuid
 import os
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException
-from pydantic import BaseModel
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import List
 
+from botocore.exceptions import ClientError
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from pydantic import BaseModel, Field
+
+from app.core.config import (
+    MEDIA_MAX_IMAGE_BYTES,
+    MEDIA_MAX_VIDEO_BYTES,
+    MEDIA_SIZE_LIMITS,
+    MEDIA_STREAM_CHUNK_SIZE,
+    PRESIGN_EXPIRES_SECONDS,
+    UPLOAD_PART_SIZE,
+)
 from app.core.deps import get_current_user
 from app.db.models import User
-from app.services.minio_service import ensure_bucket, get_object_content_type, put_object, presign_get_url
+from app.services.minio_service import (
+    abort_multipart_upload,
+    cached_content_type,
+    complete_multipart_upload,
+    create_multipart_upload,
+    cached_presign_get_url,
+    ensure_bucket,
+    get_object,
+    get_object_content_type,
+    head_object,
+    put_object,
+    remember_content_type,
+    run_s3,
+    upload_part,
+)
 from app.services.events import log_event
-from fastapi.responses import StreamingResponse
-from app.services.minio_service import get_object
+from app.services.media_cache import media_cache
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.datastructures import UploadFile
 
 
 router = APIRouter(prefix="/media", tags=["media"])
@@ -35,17 +64,124 @@ CONTENT_TYPE_EXTENSIONS = {
     "video/quicktime": ".mov",
 }
 
+# Room for the multipart boundaries and part headers around the file itself.
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+# Media keys are uuid-based and never rewritten, so responses can be cached forever.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
 class PresignOut(BaseModel):
     key: str
     url: str
     content_type: str
 
+class PresignBatchIn(BaseModel):
+    keys: List[str] = Field(..., max_length=200)
+
+class PresignBatchOut(BaseModel):
+    items: List[PresignOut]
+    missing: List[str]
+
+async def _content_type(key: str) -> str | None:
+    content_type = cached_content_type(key)
+    if content_type is not None:
+        return content_type
+    try:
+        return await run_s3(get_object_content_type, key)
+    except ClientError as exc:
+        if exc.response.get("Error", {}).get("Code") in {"404", "NoSuchKey", "NotFound"}:
+            return None
+        raise
+
+def max_upload_bytes(content_type: str) -> int:
+    if content_type in MEDIA_SIZE_LIMITS:
+        return MEDIA_SIZE_LIMITS[content_type]
+    return MEDIA_MAX_VIDEO_BYTES if content_type.startswith("video/") else MEDIA_MAX_IMAGE_BYTES
+
+def max_request_bytes() -> int:
+    """Largest upload body any allowed content type can need, before the form is parsed."""
+    return max(MEDIA_MAX_IMAGE_BYTES, MEDIA_MAX_VIDEO_BYTES, *MEDIA_SIZE_LIMITS.values()) + MULTIPART_OVERHEAD_BYTES
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"File exceeds the {max_bytes // (1024 * 1024)} MB limit")
+
+def _limited_receive(receive, max_bytes: int):
+    """Wrap the ASGI receive channel so the body is cut off as soon as it passes max_bytes."""
+    received = 0
+
+    async def limited():
+        nonlocal received
+        message = await receive()
+        if message["type"] == "http.request":
+            received += len(message.get("body", b""))
+            if received > max_bytes:
+                raise _too_large(max_bytes)
+        return message
+
+    return limited
+
+async def _stream_to_s3(file: UploadFile, key: str, content_type: str, max_bytes: int) -> int:
+    """Copy the upload to S3 one part at a time; at most one part is held in memory."""
+    too_large = _too_large(max_bytes)
+    chunk = await file.read(UPLOAD_PART_SIZE)
+    if len(chunk) > max_bytes:
+        raise too_large
+    if len(chunk) < UPLOAD_PART_SIZE:
+        await run_s3(put_object, key, chunk, content_type)
+        return len(chunk)
+
+    upload_id = await run_s3(create_multipart_upload, key, content_type)
+    total = 0
+    parts = []
+    try:
+        while chunk:
+            total += len(chunk)
+            if total > max_bytes:
+                raise too_large
+            parts.append(await run_s3(upload_part, key, upload_id, len(parts) + 1, chunk))
+            chunk = await file.read(UPLOAD_PART_SIZE)
+        await run_s3(complete_multipart_upload, key, upload_id, parts)
+    except BaseException:
+        await run_s3(abort_multipart_upload, key, upload_id)
+        raise
+    return total
+
 @router.on_event("startup")
 def _startup_minio():
     ensure_bucket()
 
-@router.post("/upload", response_model=dict)
-async def upload_media(file: UploadFile = File(...), me: User = Depends(get_current_user)):
+# Declared by hand because the body is not a parameter; keeps the file field in Swagger's "Try it out".
+UPLOAD_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "multipart/form-data": {
+            "schema": {
+                "type": "object",
+                "properties": {"file": {"type": "string", "format": "binary"}},
+                "required": ["file"],
+            }
+        }
+    },
+}
+
+@router.post("/upload", response_model=dict, openapi_extra={"requestBody": UPLOAD_REQUEST_BODY})
+async def upload_media(request: Request, me: User = Depends(get_current_user)):
+    # The form is parsed here rather than by a File() parameter so oversized bodies are refused
+    # before they are spooled: on Content-Length up front, and as bytes arrive for chunked uploads.
+    max_body = max_request_bytes()
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_body:
+        raise _too_large(max_body)
+    form = await Request(request.scope, _limited_receive(request.receive, max_body)).form()
+    try:
+        file = form.get("file")
+        if not isinstance(file, UploadFile):
+            raise HTTPException(status_code=400, detail="Missing file")
+        return await _store_upload(file, me)
+    finally:
+        await form.close()
+
+async def _store_upload(file: UploadFile, me: User) -> dict:
     if not file.content_type:
         raise HTTPException(status_code=400, detail="Missing content_type")
 
@@ -58,32 +194,144 @@ async def upload_media(file: UploadFile = File(...), me: User = Depends(get_curr
         ext = expected_ext
     key = f"media/u{me.id}/{uuid.uuid4().hex}{ext}"
 
-    content = await file.read()
-    put_object(key, content, file.content_type)
-    url = presign_get_url(key, expires_seconds=3600)
+    size = await _stream_to_s3(file, key, file.content_type, max_upload_bytes(file.content_type))
+    remember_content_type(key, file.content_type)
+    url = cached_presign_get_url(key)
 
-    log_event("media_upload", me.id, {"key": key, "content_type": file.content_type, "bytes": len(content)})
+    log_event("media_upload", me.id, {"key": key, "content_type": file.content_type, "bytes": size})
     return {
         "media_key": key,
         "presigned_get_url": url,
         "content_type": file.content_type,
-        "expires_seconds": 3600,
+        "expires_seconds": PRESIGN_EXPIRES_SECONDS,
     }
 
 @router.get("/presign", response_model=PresignOut)
-def presign(key: str, me: User = Depends(get_current_user)):
-    url = presign_get_url(key, expires_seconds=3600)
-    content_type = get_object_content_type(key)
-    return PresignOut(key=key, url=url, content_type=content_type)
+async def presign(key: str, me: User = Depends(get_current_user)):
+    content_type = await _content_type(key)
+    if content_type is None:
+        raise HTTPException(status_code=404, detail="Media not found")
+    return PresignOut(key=key, url=cached_presign_get_url(key), content_type=content_type)
+
+@router.post("/presign/batch", response_model=PresignBatchOut)
+async def presign_batch(data: PresignBatchIn, me: User = Depends(get_current_user)):
+    keys = list(dict.fromkeys(data.keys))
+    content_types = await asyncio.gather(*(_content_type(key) for key in keys))
+    items, missing = [], []
+    for key, content_type in zip(keys, content_types):
+        if content_type is None:
+            missing.append(key)
+        else:
+            items.append(PresignOut(key=key, url=cached_presign_get_url(key), content_type=content_type))
+    return PresignBatchOut(items=items, missing=missing)
+
+def _parse_http_date(value: str | None) -> datetime | None:
+    """HTTP-date header value as an aware datetime; None when absent or invalid (RFC 9110 says ignore it)."""
+    if not value:
+        return None
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def _not_modified(headers: dict, if_none_match: str | None, modified_since: datetime | None) -> bool:
+    # If-None-Match wins when present; If-Modified-Since is only consulted without it.
+    if if_none_match:
+        return if_none_match == headers.get("ETag")
+    last_modified = _parse_http_date(headers.get("Last-Modified"))
+    return modified_since is not None and last_modified is not None and last_modified <= modified_since
+
+def _read_chunk(body, sink):
+    chunk = body.read(MEDIA_STREAM_CHUNK_SIZE)
+    if sink is not None and chunk:
+        sink.write(chunk)
+    return chunk
+
+async def _iter_body(body, sink=None):
+    complete = False
+    try:
+        while True:
+            chunk = await run_s3(_read_chunk, body, sink)
+            if not chunk:
+                complete = True
+                break
+            yield chunk
+    finally:
+        body.close()
+        if sink is not None:
+            await run_s3(sink.commit if complete else sink.discard)
 
 @router.get("/{path:path}")
-async def serve_media(path: str):
-    data, content_type = get_object(path)
+async def serve_media(
+    path: str,
+    range_header: str | None = Header(None, alias="Range"),
+    if_none_match: str | None = Header(None),
+    if_modified_since: str | None = Header(None),
+):
+    modified_since = None if if_none_match else _parse_http_date(if_modified_since)
+    if media_cache is not None:
+        cached = await run_s3(media_cache.lookup, path)
+        if cached is not None:
+            data_path, meta, stat_result = cached
+            headers = {
+                "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+                "Content-Disposition": "inline",
+                "X-Content-Type-Options": "nosniff",
+                **meta["headers"],
+            }
+            if _not_modified(meta["headers"], if_none_match, modified_since):
+                return Response(status_code=304, headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL, **meta["headers"]})
+            return FileResponse(data_path, headers=headers, media_type=meta["content_type"], stat_result=stat_result)
+
+    try:
+        obj = await run_s3(get_object, path, range_header, if_none_match, modified_since)
+    except ClientError as exc:
+        error = exc.response.get("Error", {})
+        code = str(error.get("Code"))
+        if code in {"304", "NotModified"}:
+            headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL}
+            if if_none_match:
+                headers["ETag"] = if_none_match
+            return Response(status_code=304, headers=headers)
+        if code in {"404", "NoSuchKey", "NotFound"}:
+            raise HTTPException(status_code=404, detail="Media not found")
+        if code in {"416", "InvalidRange"}:
+            size = (await run_s3(head_object, path))["ContentLength"]
+            raise HTTPException(
+                status_code=416,
+                detail="Requested range not satisfiable",
+                headers={"Content-Range": f"bytes */{size}"},
+            )
+        raise
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "Content-Disposition": "inline",
+        "Content-Length": str(obj["ContentLength"]),
+        "X-Content-Type-Options": "nosniff",
+    }
+    if obj.get("ETag"):
+        headers["ETag"] = obj["ETag"]
+    if obj.get("LastModified"):
+        headers["Last-Modified"] = format_datetime(obj["LastModified"].astimezone(timezone.utc), usegmt=True)
+    content_type = obj.get("ContentType", "application/octet-stream")
+    status_code = 200
+    if obj.get("ContentRange"):
+        headers["Content-Range"] = obj["ContentRange"]
+        status_code = 206
+
+    sink = None
+    if media_cache is not None and status_code == 200:
+        cached_headers = {name: headers[name] for name in ("ETag", "Last-Modified") if name in headers}
+        sink = await run_s3(
+            media_cache.writer, path, obj["ContentLength"], {"content_type": content_type, "headers": cached_headers}
+        )
+
     return StreamingResponse(
-        data,
+        _iter_body(obj["Body"], sink),
+        status_code=status_code,
         media_type=content_type,
-        headers={
-            "Content-Disposition": "inline",
-            "X-Content-Type-Options": "nosniff",
-        },
+        headers=headers,
     )
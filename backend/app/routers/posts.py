@@ -1,47 +1,41 @@
 import uuid
-from datetime import datetime, timezone
-from typing import List
+from datetime import datetime, timedelta, timezone
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, Field
-from sqlmodel import Session, select
+from pymongo.errors import BulkWriteError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.core.config import BULK_MAX_ITEMS, MAX_PAGE_SIZE
 from app.core.deps import get_current_user
-from app.db.models import Community, CommunityMembership, User
-from app.db.postgres import get_session
+from app.db.models import Community, User
+from app.db.postgres import get_async_session
 from app.db.mongo import get_db
-from app.services.events import log_event
+from app.services.authors import attach_authors, remember_author
+from app.services.events import log_event, log_events
+from app.services.memberships import community_ids_for, is_member, remember_post_community
+from app.services.pagination import fetch_page, fetch_page_in
+from app.services.ranking import hot_base, hot_rank
 
 router = APIRouter(tags=["posts"])
 
+# Each sort order is served by its own (community_id, <field>, post_id) index.
+POST_SORT_FIELDS = {"new": "created_at", "hot": "hot_rank", "top": "score"}
+
 class PostIn(BaseModel):
     community_id: int
     title: str
     body: str = ""
     media_keys: List[str] = Field(default_factory=list)
 
-@router.post("/posts", response_model=dict)
-async def create_post(
-    data: PostIn,
-    session: Session = Depends(get_session),
-    me: User = Depends(get_current_user),
-):
-    community = session.exec(select(Community).where(Community.id == data.community_id)).first()
-    if not community:
-        raise HTTPException(status_code=404, detail="Community not found")
-
-    membership = session.exec(
-        select(CommunityMembership).where(
-            CommunityMembership.user_id == me.id,
-            CommunityMembership.community_id == data.community_id,
-        )
-    ).first()
-    if not membership:
-        raise HTTPException(status_code=403, detail="Join the community to post.")
+class PostBulkIn(BaseModel):
+    items: List[PostIn] = Field(..., min_length=1, max_length=BULK_MAX_ITEMS)
 
-    post_id = str(uuid.uuid4())
-    doc = {
-        "post_id": post_id,
+def _new_post_doc(data: PostIn, me: User, created_at: datetime) -> dict:
+    return {
+        "post_id": str(uuid.uuid4()),
         "community_id": data.community_id,
         "author_user_id": me.id,
         "author_username": me.username,
@@ -49,53 +43,132 @@ async def create_post(
         "title": data.title,
         "body": data.body,
         "media_keys": data.media_keys,
-        "created_at": datetime.now(timezone.utc).isoformat(),
+        "created_at": created_at.isoformat(),
         "score": 0,
+        "hot_base": hot_base(created_at),
+        "hot_rank": hot_rank(0, created_at),
         "num_comments": 0,
     }
+
+@router.post("/posts", response_model=dict)
+async def create_post(
+    data: PostIn,
+    session: AsyncSession = Depends(get_async_session),
+    me: User = Depends(get_current_user),
+):
+    if not await is_member(me.id, data.community_id, session):
+        community = (await session.exec(select(Community).where(Community.id == data.community_id))).first()
+        if not community:
+            raise HTTPException(status_code=404, detail="Community not found")
+        raise HTTPException(status_code=403, detail="Join the community to post.")
+
+    doc = _new_post_doc(data, me, datetime.now(timezone.utc))
+    post_id = doc["post_id"]
     db = get_db()
     await db.posts.insert_one(doc)
 
+    remember_author(me)
+    remember_post_community(post_id, data.community_id)
+
     doc.pop("_id", None)
     log_event("post_create", me.id, {"post_id": post_id, "community_id": data.community_id, "has_media": bool(data.media_keys)})
     return doc
 
-@router.get("/communities/{community_id}/posts", response_model=list[dict])
+@router.post("/posts/bulk", response_model=dict)
+async def create_posts_bulk(
+    data: PostBulkIn,
+    session: AsyncSession = Depends(get_async_session),
+    me: User = Depends(get_current_user),
+):
+    """Insert many posts: one membership check per community, one unordered insert_many.
+
+    Items keep their input order (created_at steps by 1µs), and `results[i]` reports item i as {"ok": true, "post_id"} or {"ok": false, "error"}.
+    """
+    community_ids = {item.community_id for item in data.items}
+    allowed = {cid for cid in community_ids if await is_member(me.id, cid, session)}
+    denied = community_ids - allowed
+    existing = set()
+    if denied:
+        existing = set((await session.exec(select(Community.id).where(Community.id.in_(denied)))).all())
+
+    results: List[dict] = [{}] * len(data.items)
+    docs, doc_items = [], []
+    base = datetime.now(timezone.utc)
+    for i, item in enumerate(data.items):
+        if item.community_id not in allowed:
+            error = "Join the community to post." if item.community_id in existing else "Community not found"
+            results[i] = {"ok": False, "error": error}
+            continue
+        docs.append(_new_post_doc(item, me, base + timedelta(microseconds=i)))
+        doc_items.append(i)
+
+    failed = {}
+    if docs:
+        try:
+            await get_db().posts.insert_many(docs, ordered=False)
+        except BulkWriteError as exc:
+            failed = {err["index"]: err.get("errmsg", "Write failed") for err in exc.details.get("writeErrors", [])}
+
+    events = []
+    for n, (i, doc) in enumerate(zip(doc_items, docs)):
+        if n in failed:
+            results[i] = {"ok": False, "error": failed[n]}
+            continue
+        results[i] = {"ok": True, "post_id": doc["post_id"]}
+        remember_post_community(doc["post_id"], doc["community_id"])
+        events.append({"post_id": doc["post_id"], "community_id": doc["community_id"], "has_media": bool(doc["media_keys"]), "bulk": True})
+    if events:
+        remember_author(me)
+    log_events("post_create", me.id, events)
+    return {"inserted": len(events), "failed": len(results) - len(events), "results": results}
+
+@router.get("/communities/{community_id}/posts", response_model=dict)
 async def list_posts(
     community_id: int,
-    limit: int = 20,
-    skip: int = 0,
-    session: Session = Depends(get_session),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: Literal["new", "hot", "top"] = "new",
+    session: AsyncSession = Depends(get_async_session),
 ):
     db = get_db()
-    cursor = db.posts.find({"community_id": community_id}).sort("created_at", -1).skip(skip).limit(limit)
-    posts = await cursor.to_list(length=limit)
-    author_ids = {post.get("author_user_id") for post in posts if post.get("author_user_id")}
-    author_map = {}
-    if author_ids:
-        users = session.exec(select(User).where(User.id.in_(author_ids))).all()
-        author_map = {
-            user.id: {"author_username": user.username, "author_display_name": user.display_name}
-            for user in users
-        }
-    for p in posts:
-        p.pop("_id", None)
-        author = author_map.get(p.get("author_user_id"))
-        if author:
-            p.update(author)
-    return posts
+    posts, next_cursor = await fetch_page(
+        db.posts,
+        {"community_id": community_id},
+        "post_id",
+        limit,
+        cursor,
+        descending=True,
+        sort_field=POST_SORT_FIELDS[sort],
+    )
+    await attach_authors(posts, session)
+    return {"items": posts, "next_cursor": next_cursor}
+
+@router.get("/feed", response_model=dict)
+async def home_feed(
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_session),
+    me: User = Depends(get_current_user),
+):
+    community_ids = await community_ids_for(me.id, session)
+    if not community_ids:
+        return {"items": [], "next_cursor": None}
+
+    # $in queries of at most IN_SORT_MERGE_LIMIT communities, each an index-order merge of the
+    # per-community ranges; fetch_page_in k-way merges them for members of more communities.
+    db = get_db()
+    posts, next_cursor = await fetch_page_in(
+        db.posts, "community_id", sorted(community_ids), "post_id", limit, cursor, descending=True
+    )
+    await attach_authors(posts, session)
+    return {"items": posts, "next_cursor": next_cursor}
 
 @router.get("/posts/{post_id}", response_model=dict)
-async def get_post(post_id: str, session: Session = Depends(get_session)):
+async def get_post(post_id: str, session: AsyncSession = Depends(get_async_session)):
     db = get_db()
     p = await db.posts.find_one({"post_id": post_id})
     if not p:
         raise HTTPException(status_code=404, detail="Post not found")
     p.pop("_id", None)
-    author_user_id = p.get("author_user_id")
-    if author_user_id:
-        user = session.exec(select(User).where(User.id == author_user_id)).first()
-        if user:
-            p["author_username"] = user.username
-            p["author_display_name"] = user.display_name
+    await attach_authors([p], session)
     return p
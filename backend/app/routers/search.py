@@ -0,0 +1,100 @@
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import MAX_PAGE_SIZE, SEARCH_MAX_OFFSET
+from app.db.mongo import get_db
+from app.db.postgres import get_async_session
+from app.services.authors import attach_authors
+from app.services.pagination import decode_cursor, encode_cursor
+from app.services.search import query_terms, snippet
+
+router = APIRouter(tags=["search"])
+
+_TEXT_SCORE = {"$meta": "textScore"}
+
+# Section -> (collection, id field, projected fields).
+SECTIONS = {
+    "posts": (
+        "posts",
+        "post_id",
+        ["post_id", "community_id", "author_user_id", "title", "body", "created_at", "score", "num_comments"],
+    ),
+    "comments": (
+        "comments",
+        "comment_id",
+        ["comment_id", "post_id", "community_id", "author_user_id", "body", "created_at", "score"],
+    ),
+}
+
+
+async def _ranked_section(section: str, community_id: Optional[int], q: str, offset: int, limit: int) -> dict:
+    """One page of a section's matches, best text score first.
+
+    Sorting on the score before $limit lets Mongo run a top-k sort that only holds
+    offset + limit + 1 documents, so every match is ranked at bounded memory. Scores are only
+    compared within a section: posts weight titles, comments do not.
+    """
+    collection, id_field, fields = SECTIONS[section]
+    match = {"$text": {"$search": q}}
+    if community_id is not None:
+        match["community_id"] = community_id
+    limit = min(limit, SEARCH_MAX_OFFSET - offset)
+    pipeline = [
+        {"$match": match},
+        {"$sort": {"rank": _TEXT_SCORE, id_field: 1}},
+        {"$limit": offset + limit + 1},
+        {"$skip": offset},
+        {"$project": {"_id": 0, **{field: 1 for field in fields}, "rank": _TEXT_SCORE}},
+    ]
+    hits = await get_db()[collection].aggregate(pipeline).to_list(length=limit + 1)
+    next_cursor = None
+    if len(hits) > limit and offset + limit < SEARCH_MAX_OFFSET:
+        next_cursor = encode_cursor("offset", offset + limit, section)
+    return {"items": hits[:limit], "next_cursor": next_cursor}
+
+
+@router.get("/search", response_model=dict)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    community_id: Optional[int] = None,
+    type: Literal["all", "posts", "comments"] = "all",
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Posts and comments matching `q`, optionally in one community, each section ranked by its own
+    text score.
+
+    A cursor continues the section it was issued for, so it needs type=posts or type=comments.
+    Sections page up to SEARCH_MAX_OFFSET hits deep.
+    """
+    sections = ["posts", "comments"] if type == "all" else [type]
+    offset = 0
+    if cursor:
+        offset, section = decode_cursor(cursor, "offset")
+        if not isinstance(offset, int) or not 0 <= offset < SEARCH_MAX_OFFSET or section != type:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    result = {section: await _ranked_section(section, community_id, q, offset, limit) for section in sections}
+
+    db = get_db()
+    terms = query_terms(q)
+    posts = result.get("posts", {}).get("items", [])
+    comments = result.get("comments", {}).get("items", [])
+    titles = {}
+    if comments:
+        comment_post_ids = list({hit["post_id"] for hit in comments})
+        titles = {
+            p["post_id"]: p.get("title", "")
+            async for p in db.posts.find({"post_id": {"$in": comment_post_ids}}, {"_id": 0, "post_id": 1, "title": 1})
+        }
+    for hit in posts:
+        hit["title_highlighted"] = snippet(hit.get("title", ""), terms, width=len(hit.get("title", "")) or 1)
+        hit["snippet"] = snippet(hit.pop("body", ""), terms)
+    for hit in comments:
+        hit["title"] = titles.get(hit["post_id"], "")
+        hit["snippet"] = snippet(hit.pop("body", ""), terms)
+    await attach_authors(posts + comments, session)
+    return result
@@ -2,9 +2,10 @@ from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from sqlmodel import Session, select
 
-from app.core.deps import get_current_user
+from app.core.deps import get_current_user, invalidate_user
 from app.db.models import Community, CommunityMembership, User
 from app.db.postgres import get_session
+from app.services.authors import invalidate_author
 from app.services.events import log_event
 
 router = APIRouter(prefix="/users", tags=["users"])
@@ -41,6 +42,11 @@ def update_me(
     session: Session = Depends(get_session),
     me: User = Depends(get_current_user),
 ):
+    # `me` may be a cached snapshot; edit the row loaded in this session.
+    me = session.get(User, me.id)
+    if not me:
+        raise HTTPException(status_code=404, detail="User not found")
+
     if data.username is not None:
         cleaned = data.username.strip()
         if not cleaned:
@@ -60,6 +66,8 @@ def update_me(
     session.add(me)
     session.commit()
     session.refresh(me)
+    invalidate_user(me.id)
+    invalidate_author(me.id)
 
     log_event(
         "user_profile_update",
@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.core.deps import get_current_user
+from app.db.models import User
+from app.db.mongo import get_db
+from app.services.events import log_event
+from app.services.ranking import post_score_update
+
+router = APIRouter(tags=["votes"])
+
+class VoteIn(BaseModel):
+    value: Literal[-1, 0, 1]
+
+async def _record_vote(target_type: str, target_id: str, user_id: int, value: int) -> int:
+    """Store the user's vote and return the change to apply to the target's score."""
+    db = get_db()
+    key = {"target_type": target_type, "target_id": target_id, "user_id": user_id}
+    update = {"$set": {"value": value, "updated_at": datetime.now(timezone.utc).isoformat()}}
+    try:
+        previous = await db.votes.find_one_and_update(key, update, upsert=True, return_document=ReturnDocument.BEFORE)
+    except DuplicateKeyError:
+        # A concurrent first vote by the same user won the upsert; this one is now a plain update.
+        previous = await db.votes.find_one_and_update(key, update, return_document=ReturnDocument.BEFORE)
+    return value - (previous or {}).get("value", 0)
+
+@router.post("/posts/{post_id}/vote", response_model=dict)
+async def vote_post(post_id: str, data: VoteIn, me: User = Depends(get_current_user)):
+    db = get_db()
+    if not await db.posts.find_one({"post_id": post_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Post not found")
+
+    delta = await _record_vote("post", post_id, me.id, data.value)
+    post = await db.posts.find_one_and_update(
+        {"post_id": post_id},
+        post_score_update(delta),
+        projection={"_id": 0, "score": 1, "hot_rank": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    log_event("post_vote", me.id, {"post_id": post_id, "value": data.value})
+    return {"post_id": post_id, "score": post["score"], "hot_rank": post["hot_rank"], "my_vote": data.value}
+
+@router.post("/comments/{comment_id}/vote", response_model=dict)
+async def vote_comment(comment_id: str, data: VoteIn, me: User = Depends(get_current_user)):
+    db = get_db()
+    if not await db.comments.find_one({"comment_id": comment_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Comment not found")
+
+    delta = await _record_vote("comment", comment_id, me.id, data.value)
+    comment = await db.comments.find_one_and_update(
+        {"comment_id": comment_id},
+        {"$inc": {"score": delta}},
+        projection={"_id": 0, "score": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    log_event("comment_vote", me.id, {"comment_id": comment_id, "value": data.value})
+    return {"comment_id": comment_id, "score": comment["score"], "my_vote": data.value}
@@ -0,0 +1,44 @@
+from typing import Dict, List
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import AUTHOR_CACHE_SIZE, AUTHOR_CACHE_TTL_SECONDS
+from app.db.models import User
+
+# user_id -> {"author_username", "author_display_name"}. update_me evicts on rename; the TTL
+# bounds staleness from writers in other processes.
+_author_cache = TTLCache(maxsize=AUTHOR_CACHE_SIZE, ttl=AUTHOR_CACHE_TTL_SECONDS)
+
+
+def _profile(user: User) -> Dict[str, str]:
+    return {"author_username": user.username, "author_display_name": user.display_name}
+
+
+def remember_author(user: User) -> None:
+    _author_cache.set(user.id, _profile(user))
+
+
+def invalidate_author(user_id: int) -> None:
+    _author_cache.pop(user_id)
+
+
+async def attach_authors(docs: List[dict], session: AsyncSession) -> None:
+    """Fill author_username/author_display_name on posts or comments; misses load in one IN query."""
+    profiles = {}
+    missing = set()
+    for user_id in {doc.get("author_user_id") for doc in docs if doc.get("author_user_id")}:
+        profile = _author_cache.get(user_id)
+        if profile is None:
+            missing.add(user_id)
+        else:
+            profiles[user_id] = profile
+    if missing:
+        for user in (await session.exec(select(User).where(User.id.in_(missing)))).all():
+            profiles[user.id] = _profile(user)
+            remember_author(user)
+    for doc in docs:
+        profile = profiles.get(doc.get("author_user_id"))
+        if profile:
+            doc.update(profile)
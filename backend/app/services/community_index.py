@@ -0,0 +1,102 @@
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlmodel import Session, select
+
+from app.core.config import COMMUNITY_INDEX_REFRESH_SECONDS
+from app.db.models import Community
+
+
+def _entry(community: Community) -> Dict[str, Any]:
+    return {
+        "id": community.id,
+        "name": community.name,
+        "description": community.description,
+        "created_by_user_id": community.created_by_user_id,
+        "created_at": community.created_at,
+    }
+
+
+def _name_key(entry: Dict[str, Any]) -> Tuple[str, int]:
+    return entry["name"].lower(), entry["id"]
+
+
+class CommunityIndex:
+    """In-memory community directory: rows by id plus a (lower(name), id) list kept sorted for
+    paging and prefix search.
+
+    create/update patch it in place and bump `version`. Writes made by other workers are picked
+    up by a full reload every COMMUNITY_INDEX_REFRESH_SECONDS, which only bumps `version` when
+    the contents actually changed.
+    """
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self.version = 0
+        self._by_id: Dict[int, Dict[str, Any]] = {}
+        self._names: List[Tuple[str, int]] = []
+        self._newest_first: Optional[List[Dict[str, Any]]] = None
+        self._loaded_at = 0.0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def ensure_fresh(self, session: Session) -> None:
+        if time.monotonic() - self._loaded_at < self.refresh_seconds:
+            return
+        writes = self._writes
+        rows = {c.id: _entry(c) for c in session.exec(select(Community)).all()}
+        with self._lock:
+            if writes != self._writes:
+                # A local upsert raced the reload; keep it and retry on the next call.
+                return
+            if rows != self._by_id:
+                self._by_id = rows
+                self._names = sorted(_name_key(entry) for entry in rows.values())
+                self._newest_first = None
+                self.version += 1
+            self._loaded_at = time.monotonic()
+
+    def upsert(self, community: Community) -> None:
+        entry = _entry(community)
+        with self._lock:
+            previous = self._by_id.get(community.id)
+            if previous == entry:
+                return
+            if previous is not None:
+                del self._names[bisect_left(self._names, _name_key(previous))]
+            self._by_id[community.id] = entry
+            insort(self._names, _name_key(entry))
+            self._newest_first = None
+            self._writes += 1
+            self.version += 1
+
+    def newest_first(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            if self._newest_first is None:
+                self._newest_first = sorted(
+                    self._by_id.values(), key=lambda entry: (entry["created_at"], entry["id"]), reverse=True
+                )
+            return self._newest_first
+
+    def page(self, limit: int, after: Optional[Tuple[str, int]] = None) -> Tuple[List[Dict[str, Any]], bool]:
+        """Up to `limit` communities in name order after the `after` key, plus whether more remain."""
+        with self._lock:
+            start = bisect_right(self._names, after) if after else 0
+            keys = self._names[start : start + limit + 1]
+            return [self._by_id[key[1]] for key in keys[:limit]], len(keys) > limit
+
+    def search(self, prefix: str, limit: int) -> List[Dict[str, Any]]:
+        prefix = prefix.lower()
+        with self._lock:
+            start = bisect_left(self._names, (prefix, -1))
+            matches = []
+            for name, community_id in self._names[start : start + limit]:
+                if not name.startswith(prefix):
+                    break
+                matches.append(self._by_id[community_id])
+            return matches
+
+
+community_index = CommunityIndex(COMMUNITY_INDEX_REFRESH_SECONDS)
@@ -1,21 +1,166 @@
+import atexit
 import json
+import logging
 import os
+import queue
+import threading
+import time
 from datetime import datetime, timezone
-from typing import Any, Dict
+from typing import Any, Dict, List, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: rely on O_APPEND alone
+    fcntl = None
+
+from app.core.config import (
+    EVENT_BATCH_SIZE,
+    EVENT_FLUSH_SECONDS,
+    EVENT_FSYNC,
+    EVENT_LOG_DIR,
+    EVENT_QUEUE_SIZE,
+)
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class EventWriter:
+    """Buffers event lines in a bounded queue and appends them to day files from a background thread.
+
+    A batch is written when it reaches `batch_size` lines or `flush_seconds` after its first line.
+    Each day file's batch goes out in one locked O_APPEND write, so lines stay intact when several
+    workers share the same file.
+    """
+
+    def __init__(self, directory: str, queue_size: int, batch_size: int, flush_seconds: float, fsync: str):
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.fsync = fsync
+        self.dropped = 0
+        self._queue: "queue.Queue[Tuple[str, str]]" = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._fd: int | None = None
+        self._fd_day: str | None = None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="event-writer", daemon=True)
+            self._thread.start()
+
+    def submit(self, day: str, line: str, count: int = 1) -> None:
+        """Queue `line` (or `count` newline-terminated lines submitted as one entry)."""
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+        try:
+            self._queue.put_nowait((day, line))
+        except queue.Full:
+            self.dropped += count
+            if self.dropped % 1000 < count:
+                logger.warning("Event queue full; dropped %s events so far", self.dropped)
+
+    def close(self) -> None:
+        with self._lock:
+            thread = self._thread
+            self._stop.set()
+        if thread is not None:
+            thread.join(timeout=self.flush_seconds + 5)
+        self._close_fd()
+
+    def _run(self) -> None:
+        while not self._stop.is_set() or not self._queue.empty():
+            batch = self._next_batch()
+            if batch:
+                self._write(batch)
+
+    def _next_batch(self) -> List[Tuple[str, str]]:
+        try:
+            batch = [self._queue.get(timeout=self.flush_seconds)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_seconds
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0 or self._stop.is_set():
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: List[Tuple[str, str]]) -> None:
+        by_day: Dict[str, List[str]] = {}
+        for day, line in batch:
+            by_day.setdefault(day, []).append(line)
+        for day, lines in by_day.items():
+            try:
+                self._append(day, "".join(lines).encode("utf-8"))
+            except OSError as exc:
+                logger.error("Failed to write %s events for %s: %s", len(lines), day, exc)
+                self._close_fd()
+
+    def _append(self, day: str, data: bytes) -> None:
+        if self._fd_day != day:
+            self._close_fd()
+            path = os.path.join(self.directory, f"{day}.jsonl")
+            self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._fd_day = day
+        if fcntl:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            view = memoryview(data)
+            while view:
+                written = os.write(self._fd, view)
+                view = view[written:]
+            if self.fsync == "batch":
+                os.fsync(self._fd)
+        finally:
+            if fcntl:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _close_fd(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd = None
+        self._fd_day = None
+
+
+_writer = EventWriter(EVENT_LOG_DIR, EVENT_QUEUE_SIZE, EVENT_BATCH_SIZE, EVENT_FLUSH_SECONDS, EVENT_FSYNC)
+atexit.register(_writer.close)
 
-from app.core.config import EVENT_LOG_DIR
 
 def log_event(event_type: str, actor_user_id: int | None, payload: Dict[str, Any]) -> None:
-    os.makedirs(EVENT_LOG_DIR, exist_ok=True)
     now = datetime.now(timezone.utc)
-    day = now.strftime("%Y-%m-%d")
-    path = os.path.join(EVENT_LOG_DIR, f"{day}.jsonl")
-
     record = {
         "ts": now.isoformat(),
         "type": event_type,
         "actor_user_id": actor_user_id,
         "payload": payload,
     }
-    with open(path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(record, ensure_ascii=False) + "\n")
\ No newline at end of file
+    _writer.submit(now.strftime("%Y-%m-%d"), json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def log_events(event_type: str, actor_user_id: int | None, payloads: List[Dict[str, Any]]) -> None:
+    """log_event for many records at once; they share a timestamp and take one queue slot."""
+    if not payloads:
+        return
+    now = datetime.now(timezone.utc)
+    ts = now.isoformat()
+    lines = "".join(
+        json.dumps({"ts": ts, "type": event_type, "actor_user_id": actor_user_id, "payload": payload}, ensure_ascii=False)
+        + "\n"
+        for payload in payloads
+    )
+    _writer.submit(now.strftime("%Y-%m-%d"), lines, count=len(payloads))
+
+
+def shutdown_event_writer() -> None:
+    _writer.close()
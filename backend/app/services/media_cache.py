@@ -0,0 +1,189 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: size accounting and evictions are not coordinated across workers
+    fcntl = None
+
+from app.core.config import MEDIA_CACHE_DIR, MEDIA_CACHE_MAX_BYTES, MEDIA_CACHE_MAX_OBJECT_BYTES
+from app.services.metrics import MEDIA_CACHE_BYTES, MEDIA_CACHE_EVENTS
+
+logger = logging.getLogger("uvicorn.error")
+
+# Temp files untouched for this long belong to a writer that died before commit() or discard().
+STALE_TMP_SECONDS = 3600
+
+
+class CacheWriter:
+    """Collects an object's bytes into a temp file inside the cache dir; commit() publishes it atomically."""
+
+    def __init__(self, cache: "MediaDiskCache", key: str, meta: Dict[str, Any]):
+        self.cache = cache
+        self.key = key
+        self.meta = meta
+        self.size = 0
+        fd, self.tmp_path = tempfile.mkstemp(dir=cache.tmp_dir)
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, chunk: bytes) -> None:
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self) -> None:
+        self._file.close()
+        self.cache.publish(self.key, self.tmp_path, self.meta, self.size)
+
+    def discard(self) -> None:
+        self._file.close()
+        try:
+            os.unlink(self.tmp_path)
+        except FileNotFoundError:
+            pass
+
+
+class MediaDiskCache:
+    """LRU-by-bytes cache of media objects on local disk, shared by every worker on the host.
+
+    Entries are `<sha256(key)>` data files with a `.json` sidecar holding the response metadata.
+    Recency is the data file's mtime (touched on every hit). The running byte total lives in a
+    `.size` file next to the entries and is only read or written under an exclusive lock, so all
+    workers see the same total and the directory stays within max_bytes however many there are.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, max_object_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_object_bytes = max_object_bytes
+        self.tmp_dir = os.path.join(directory, "tmp")
+        self._size_path = os.path.join(directory, ".size")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self._sweep_tmp()
+        with self._locked():
+            total = self._scan()[0]
+            self._write_size(total)
+        MEDIA_CACHE_BYTES.set(total)
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, digest[:2], digest)
+        return base, f"{base}.json"
+
+    @contextmanager
+    def _locked(self):
+        with open(os.path.join(self.directory, ".lock"), "a") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _read_size(self) -> int:
+        try:
+            with open(self._size_path, "r", encoding="utf-8") as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            return self._scan()[0]
+
+    def _write_size(self, total: int) -> None:
+        with open(self._size_path, "w", encoding="utf-8") as f:
+            f.write(str(total))
+
+    def _sweep_tmp(self) -> None:
+        cutoff = time.time() - STALE_TMP_SECONDS
+        for entry in os.scandir(self.tmp_dir):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+            except FileNotFoundError:
+                pass
+
+    def lookup(self, key: str) -> Optional[Tuple[str, Dict[str, Any], os.stat_result]]:
+        data_path, meta_path = self._paths(key)
+        try:
+            stat_result = os.stat(data_path)
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            os.utime(data_path)
+        except (OSError, ValueError):
+            MEDIA_CACHE_EVENTS.labels("miss").inc()
+            return None
+        MEDIA_CACHE_EVENTS.labels("hit").inc()
+        return data_path, meta, stat_result
+
+    def writer(self, key: str, size: int, meta: Dict[str, Any]) -> Optional[CacheWriter]:
+        if size > self.max_object_bytes:
+            return None
+        return CacheWriter(self, key, meta)
+
+    def publish(self, key: str, tmp_path: str, meta: Dict[str, Any], size: int) -> None:
+        data_path, meta_path = self._paths(key)
+        os.makedirs(os.path.dirname(data_path), exist_ok=True)
+        # Sidecar first: a visible data file always has its metadata.
+        fd, meta_tmp = tempfile.mkstemp(dir=self.tmp_dir)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        with self._locked():
+            try:
+                replaced = os.stat(data_path).st_size
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(meta_tmp, meta_path)
+            os.replace(tmp_path, data_path)
+            total = self._read_size() + size - replaced
+            if total > self.max_bytes:
+                total = self._evict_locked()
+            self._write_size(total)
+        MEDIA_CACHE_EVENTS.labels("store").inc()
+        MEDIA_CACHE_BYTES.set(total)
+
+    def _scan(self):
+        total = 0
+        entries = []
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir() or shard.name == "tmp":
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".json"):
+                    continue
+                try:
+                    stat_result = entry.stat()
+                except FileNotFoundError:
+                    continue
+                total += stat_result.st_size
+                entries.append((stat_result.st_mtime, stat_result.st_size, entry.path))
+        return total, entries
+
+    def evict(self) -> None:
+        with self._locked():
+            total = self._evict_locked()
+            self._write_size(total)
+        MEDIA_CACHE_BYTES.set(total)
+
+    def _evict_locked(self) -> int:
+        """Drop least recently used entries down to 90% of max_bytes; the caller holds the lock."""
+        total, entries = self._scan()
+        target = int(self.max_bytes * 0.9)
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            for victim in (path, f"{path}.json"):
+                try:
+                    os.unlink(victim)
+                except FileNotFoundError:
+                    pass
+            total -= size
+            MEDIA_CACHE_EVENTS.labels("eviction").inc()
+        return total
+
+
+media_cache: MediaDiskCache | None = None
+if MEDIA_CACHE_DIR:
+    try:
+        media_cache = MediaDiskCache(MEDIA_CACHE_DIR, MEDIA_CACHE_MAX_BYTES, MEDIA_CACHE_MAX_OBJECT_BYTES)
+    except OSError as exc:
+        logger.warning("Media cache disabled; cannot use %s: %s", MEDIA_CACHE_DIR, exc)
@@ -0,0 +1,91 @@
+from typing import Dict, FrozenSet, Iterable, Optional
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import (
+    MEMBERSHIP_CACHE_SIZE,
+    MEMBERSHIP_CACHE_TTL_SECONDS,
+    POST_COMMUNITY_CACHE_SIZE,
+    POST_COMMUNITY_CACHE_TTL_SECONDS,
+)
+from app.db.models import CommunityMembership
+from app.db.mongo import get_db
+
+# user_id -> frozenset of joined community ids, patched in place by join/leave in this process.
+# Other workers only see a join or leave once their entry expires, so the TTL is kept short:
+# it still absorbs bursts of writes and feed pages. A cache miss on a (user, community) pair is
+# re-checked in Postgres, so writes right after a join on another worker are never denied.
+_membership_cache = TTLCache(maxsize=MEMBERSHIP_CACHE_SIZE, ttl=MEMBERSHIP_CACHE_TTL_SECONDS)
+# post_id -> community_id; a post never changes community.
+_post_community_cache = TTLCache(maxsize=POST_COMMUNITY_CACHE_SIZE, ttl=POST_COMMUNITY_CACHE_TTL_SECONDS)
+
+
+async def community_ids_for(user_id: int, session: AsyncSession) -> FrozenSet[int]:
+    community_ids = _membership_cache.get(user_id)
+    if community_ids is None:
+        rows = await session.exec(select(CommunityMembership.community_id).where(CommunityMembership.user_id == user_id))
+        community_ids = frozenset(rows.all())
+        _membership_cache.set(user_id, community_ids)
+    return community_ids
+
+
+async def is_member(user_id: int, community_id: int, session: AsyncSession) -> bool:
+    if community_id in await community_ids_for(user_id, session):
+        return True
+    membership = (
+        await session.exec(
+            select(CommunityMembership).where(
+                CommunityMembership.user_id == user_id,
+                CommunityMembership.community_id == community_id,
+            )
+        )
+    ).first()
+    if membership:
+        add_membership(user_id, community_id)
+    return membership is not None
+
+
+def add_membership(user_id: int, community_id: int) -> None:
+    community_ids = _membership_cache.get(user_id)
+    if community_ids is not None:
+        _membership_cache.set(user_id, community_ids | {community_id})
+
+
+def remove_membership(user_id: int, community_id: int) -> None:
+    community_ids = _membership_cache.get(user_id)
+    if community_ids is not None:
+        _membership_cache.set(user_id, community_ids - {community_id})
+
+
+def remember_post_community(post_id: str, community_id: int) -> None:
+    _post_community_cache.set(post_id, community_id)
+
+
+async def post_community_id(post_id: str) -> Optional[int]:
+    community_id = _post_community_cache.get(post_id)
+    if community_id is None:
+        post = await get_db().posts.find_one({"post_id": post_id}, {"_id": 0, "community_id": 1})
+        community_id = post.get("community_id") if post else None
+        if community_id is not None:
+            remember_post_community(post_id, community_id)
+    return community_id
+
+
+async def post_community_ids(post_ids: Iterable[str]) -> Dict[str, int]:
+    """post_community_id for many posts; misses are loaded with one $in query. Unknown posts are omitted."""
+    found, missing = {}, []
+    for post_id in set(post_ids):
+        community_id = _post_community_cache.get(post_id)
+        if community_id is None:
+            missing.append(post_id)
+        else:
+            found[post_id] = community_id
+    if missing:
+        cursor = get_db().posts.find({"post_id": {"$in": missing}}, {"_id": 0, "post_id": 1, "community_id": 1})
+        async for post in cursor:
+            if post.get("community_id") is not None:
+                found[post["post_id"]] = post["community_id"]
+                remember_post_community(post["post_id"], post["community_id"])
+    return found
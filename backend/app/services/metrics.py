@@ -0,0 +1,131 @@
+import time
+from typing import Any
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from pymongo import monitoring
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route", "status"],
+)
+SQL_LATENCY = Histogram(
+    "sql_statement_duration_seconds",
+    "SQL statement latency.",
+    ["engine", "statement"],
+)
+MONGO_LATENCY = Histogram(
+    "mongo_command_duration_seconds",
+    "MongoDB command latency.",
+    ["command", "status"],
+)
+S3_LATENCY = Histogram(
+    "s3_call_duration_seconds",
+    "S3/MinIO API call latency.",
+    ["operation", "status"],
+)
+SQL_POOL = Gauge("sql_pool_connections", "SQLAlchemy pool connections.", ["engine", "state"])
+MONGO_POOL = Gauge("mongo_pool_connections", "MongoDB pool connections.", ["state"])
+MONGO_POOL_EVENTS = Counter("mongo_pool_events_total", "MongoDB pool events.", ["event"])
+MEDIA_CACHE_EVENTS = Counter("media_cache_events_total", "Local media cache hits, misses, stores and evictions.", ["event"])
+MEDIA_CACHE_BYTES = Gauge("media_cache_bytes", "Bytes held by the local media cache (as of the last scan).")
+
+_engines: dict[str, Engine] = {}
+
+
+def render_metrics() -> tuple[bytes, str]:
+    for name, engine in _engines.items():
+        pool = engine.pool
+        for state in ("size", "checkedout", "checkedin", "overflow"):
+            getter = getattr(pool, state, None)
+            if getter is not None:
+                SQL_POOL.labels(name, state).set(getter())
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    REQUEST_LATENCY.labels(method, route, str(status)).observe(seconds)
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    _engines[name] = engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["metrics_start"].pop()
+        verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+        SQL_LATENCY.labels(name, verb).observe(time.perf_counter() - start)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("metrics_start"):
+            conn.info["metrics_start"].pop()
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        MONGO_LATENCY.labels(event.command_name, "ok").observe(event.duration_micros / 1e6)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        MONGO_LATENCY.labels(event.command_name, "error").observe(event.duration_micros / 1e6)
+
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    def pool_created(self, event):
+        MONGO_POOL_EVENTS.labels("pool_created").inc()
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        MONGO_POOL_EVENTS.labels("pool_cleared").inc()
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        MONGO_POOL.labels("open").inc()
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        MONGO_POOL.labels("open").dec()
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        MONGO_POOL_EVENTS.labels("check_out_failed").inc()
+
+    def connection_checked_out(self, event):
+        MONGO_POOL.labels("checkedout").inc()
+
+    def connection_checked_in(self, event):
+        MONGO_POOL.labels("checkedout").dec()
+
+
+def _s3_before_call(context: dict, **kwargs: Any) -> None:
+    context["metrics_start"] = time.perf_counter()
+
+
+def _s3_after_call(model, http_response, context: dict, **kwargs: Any) -> None:
+    start = context.pop("metrics_start", None)
+    if start is not None:
+        status = "ok" if http_response is not None and http_response.status_code < 400 else "error"
+        S3_LATENCY.labels(model.name, status).observe(time.perf_counter() - start)
+
+
+def instrument_s3_client(client) -> None:
+    client.meta.events.register("before-call.s3.*", _s3_before_call)
+    client.meta.events.register("after-call.s3.*", _s3_after_call)
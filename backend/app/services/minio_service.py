@@ -1,6 +1,10 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
 import boto3
 from botocore.client import Config
-from io import BytesIO
 
 from app.core.config import (
     MINIO_ENDPOINT,
@@ -8,17 +12,41 @@ from app.core.config import (
     MINIO_ACCESS_KEY,
     MINIO_SECRET_KEY,
     MINIO_BUCKET,
+    PRESIGN_CACHE_SIZE,
+    PRESIGN_EXPIRES_SECONDS,
+    PRESIGN_REFRESH_MARGIN_SECONDS,
+    S3_EXECUTOR_WORKERS,
+    S3_MAX_POOL_CONNECTIONS,
 )
+from app.core.cache import TTLCache
+from app.services.metrics import instrument_s3_client
+
+# Blocking boto3 calls run here so media traffic never holds the event loop
+# or competes with sync routes for FastAPI's default threadpool.
+_executor = ThreadPoolExecutor(max_workers=S3_EXECUTOR_WORKERS, thread_name_prefix="s3")
+
+async def run_s3(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
 
+@functools.lru_cache(maxsize=None)
 def get_s3(endpoint_url: str):
-    return boto3.client(
+    # boto3 clients are thread-safe; one long-lived client per endpoint keeps its connection pool warm.
+    client = boto3.session.Session().client(
         "s3",
         endpoint_url=endpoint_url,
         aws_access_key_id=MINIO_ACCESS_KEY,
         aws_secret_access_key=MINIO_SECRET_KEY,
-        config=Config(signature_version="s3v4"),
+        config=Config(
+            signature_version="s3v4",
+            max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+            tcp_keepalive=True,
+            retries={"max_attempts": 3, "mode": "standard"},
+        ),
         region_name="us-east-1",
     )
+    instrument_s3_client(client)
+    return client
 
 def ensure_bucket() -> None:
     s3 = get_s3(MINIO_ENDPOINT)
@@ -31,6 +59,25 @@ def put_object(key: str, content: bytes, content_type: str) -> None:
     s3 = get_s3(MINIO_ENDPOINT)
     s3.put_object(Bucket=MINIO_BUCKET, Key=key, Body=content, ContentType=content_type)
 
+def create_multipart_upload(key: str, content_type: str) -> str:
+    s3 = get_s3(MINIO_ENDPOINT)
+    return s3.create_multipart_upload(Bucket=MINIO_BUCKET, Key=key, ContentType=content_type)["UploadId"]
+
+def upload_part(key: str, upload_id: str, part_number: int, data: bytes) -> dict:
+    s3 = get_s3(MINIO_ENDPOINT)
+    response = s3.upload_part(Bucket=MINIO_BUCKET, Key=key, UploadId=upload_id, PartNumber=part_number, Body=data)
+    return {"PartNumber": part_number, "ETag": response["ETag"]}
+
+def complete_multipart_upload(key: str, upload_id: str, parts: list[dict]) -> None:
+    s3 = get_s3(MINIO_ENDPOINT)
+    s3.complete_multipart_upload(
+        Bucket=MINIO_BUCKET, Key=key, UploadId=upload_id, MultipartUpload={"Parts": parts}
+    )
+
+def abort_multipart_upload(key: str, upload_id: str) -> None:
+    s3 = get_s3(MINIO_ENDPOINT)
+    s3.abort_multipart_upload(Bucket=MINIO_BUCKET, Key=key, UploadId=upload_id)
+
 def presign_get_url(key: str, expires_seconds: int = 3600) -> str:
     s3 = get_s3(MINIO_PUBLIC_ENDPOINT)
     return s3.generate_presigned_url(
@@ -39,12 +86,47 @@ def presign_get_url(key: str, expires_seconds: int = 3600) -> str:
         ExpiresIn=expires_seconds,
     )
 
-def get_object(key: str):
-    s3 = get_s3(MINIO_ENDPOINT)  # use the S3 client
-    obj = s3.get_object(Bucket=MINIO_BUCKET, Key=key)
-    return BytesIO(obj['Body'].read()), obj['ContentType']
+# Presigned URLs are reused until shortly before they expire. Keys are uuid-based and never
+# rewritten, so content types can be kept much longer.
+_presign_cache = TTLCache(maxsize=PRESIGN_CACHE_SIZE, ttl=PRESIGN_EXPIRES_SECONDS - PRESIGN_REFRESH_MARGIN_SECONDS)
+_content_type_cache = TTLCache(maxsize=PRESIGN_CACHE_SIZE, ttl=24 * 3600)
 
-def get_object_content_type(key: str) -> str:
+def cached_presign_get_url(key: str) -> str:
+    url = _presign_cache.get(key)
+    if url is None:
+        url = presign_get_url(key, expires_seconds=PRESIGN_EXPIRES_SECONDS)
+        _presign_cache.set(key, url)
+    return url
+
+def cached_content_type(key: str) -> str | None:
+    return _content_type_cache.get(key)
+
+def remember_content_type(key: str, content_type: str) -> None:
+    _content_type_cache.set(key, content_type)
+
+def get_object(
+    key: str,
+    range_header: str | None = None,
+    if_none_match: str | None = None,
+    if_modified_since: datetime | None = None,
+) -> dict:
+    """Open an object for streaming; the caller reads and closes response["Body"]."""
+    s3 = get_s3(MINIO_ENDPOINT)
+    params = {"Bucket": MINIO_BUCKET, "Key": key}
+    if range_header:
+        params["Range"] = range_header
+    if if_none_match:
+        params["IfNoneMatch"] = if_none_match
+    if if_modified_since:
+        params["IfModifiedSince"] = if_modified_since
+    return s3.get_object(**params)
+
+def head_object(key: str) -> dict:
     s3 = get_s3(MINIO_ENDPOINT)
-    metadata = s3.head_object(Bucket=MINIO_BUCKET, Key=key)
-    return metadata.get("ContentType", "application/octet-stream")
+    return s3.head_object(Bucket=MINIO_BUCKET, Key=key)
+
+def get_object_content_type(key: str) -> str:
+    metadata = head_object(key)
+    content_type = metadata.get("ContentType", "application/octet-stream")
+    remember_content_type(key, content_type)
+    return content_type
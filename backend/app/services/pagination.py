@@ -0,0 +1,131 @@
+import asyncio
+import base64
+import binascii
+import heapq
+import json
+from itertools import islice
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from fastapi import HTTPException
+
+# None stands for a document missing the sort field, which Mongo orders as null (below every value).
+SortValue = Union[str, int, float, None]
+
+# The planner merges the index ranges of an $in in sort order ("explode for sort") only up to
+# this many values; beyond it the query becomes an index scan plus a blocking in-memory SORT.
+IN_SORT_MERGE_LIMIT = 200
+
+
+def in_chunks(values: List[Any], size: int = IN_SORT_MERGE_LIMIT) -> List[List[Any]]:
+    return [values[i : i + size] for i in range(0, len(values), size)]
+
+
+def encode_cursor(sort_field: str, value: SortValue, doc_id: str) -> str:
+    raw = json.dumps([sort_field, value, doc_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_field: str) -> Tuple[SortValue, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        field, value, doc_id = json.loads(raw)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if field != sort_field or isinstance(value, bool) or not isinstance(value, (str, int, float, type(None))):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(doc_id, str):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value, doc_id
+
+
+def _keyset_query(
+    query: Dict[str, Any], cursor: Optional[str], id_field: str, descending: bool, sort_field: str
+) -> Dict[str, Any]:
+    if not cursor:
+        return query
+    value, doc_id = decode_cursor(cursor, sort_field)
+    op = "$lt" if descending else "$gt"
+    if value is None:
+        if descending:
+            return {**query, sort_field: None, id_field: {op: doc_id}}
+        return {**query, "$or": [{sort_field: {"$ne": None}}, {sort_field: None, id_field: {op: doc_id}}]}
+    return {
+        **query,
+        # The plain range bounds the index scan; $or only breaks ties on sort_field.
+        sort_field: {"$lte" if descending else "$gte": value},
+        "$or": [
+            {sort_field: {op: value}},
+            {sort_field: value, id_field: {op: doc_id}},
+        ],
+    }
+
+
+async def _find_sorted(collection, query, id_field: str, limit: int, descending: bool, sort_field: str):
+    direction = -1 if descending else 1
+    mongo_cursor = collection.find(query).sort([(sort_field, direction), (id_field, direction)]).limit(limit)
+    return await mongo_cursor.to_list(length=limit)
+
+
+def _finish_page(
+    docs: List[Dict[str, Any]], id_field: str, limit: int, sort_field: str
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        last = docs[-1]
+        next_cursor = encode_cursor(sort_field, last.get(sort_field), last[id_field])
+    for d in docs:
+        d.pop("_id", None)
+    return docs, next_cursor
+
+
+async def fetch_page(
+    collection,
+    query: Dict[str, Any],
+    id_field: str,
+    limit: int,
+    cursor: Optional[str] = None,
+    descending: bool = False,
+    sort_field: str = "created_at",
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Keyset page over (sort_field, id_field); costs the same at any depth."""
+    query = _keyset_query(query, cursor, id_field, descending, sort_field)
+    docs = await _find_sorted(collection, query, id_field, limit + 1, descending, sort_field)
+    return _finish_page(docs, id_field, limit, sort_field)
+
+
+async def fetch_page_in(
+    collection,
+    field: str,
+    values: List[Any],
+    id_field: str,
+    limit: int,
+    cursor: Optional[str] = None,
+    descending: bool = False,
+    sort_field: str = "created_at",
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """fetch_page over `field $in values` for any number of values.
+
+    The values are split into IN_SORT_MERGE_LIMIT chunks so every chunk query is still an
+    index-order merge; the chunk pages (at most limit + 1 documents each) are read concurrently
+    and k-way merged here.
+    """
+    chunks = in_chunks(values)
+    if len(chunks) <= 1:
+        return await fetch_page(collection, {field: {"$in": values}}, id_field, limit, cursor, descending, sort_field)
+
+    pages = await asyncio.gather(
+        *(
+            _find_sorted(
+                collection,
+                _keyset_query({field: {"$in": chunk}}, cursor, id_field, descending, sort_field),
+                id_field,
+                limit + 1,
+                descending,
+                sort_field,
+            )
+            for chunk in chunks
+        )
+    )
+    merged = heapq.merge(*pages, key=lambda d: (d[sort_field], d[id_field]), reverse=descending)
+    return _finish_page(list(islice(merged, limit + 1)), id_field, limit, sort_field)
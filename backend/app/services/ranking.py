@@ -0,0 +1,54 @@
+import math
+from datetime import datetime
+from typing import Any, Dict, List
+
+# Reddit's hot ranking: log10 of the net score plus a time bonus of one order of magnitude per 12.5 hours.
+HOT_EPOCH_SECONDS = 1134028003
+HOT_DECAY_SECONDS = 45000
+
+
+def hot_base(created_at: datetime) -> float:
+    return (created_at.timestamp() - HOT_EPOCH_SECONDS) / HOT_DECAY_SECONDS
+
+
+def hot_rank(score: int, created_at: datetime) -> float:
+    sign = (score > 0) - (score < 0)
+    return sign * math.log10(max(abs(score), 1)) + hot_base(created_at)
+
+
+# Server-side hot_base for posts written before it was stored.
+_HOT_BASE_FROM_CREATED_AT = {
+    "$divide": [
+        {"$subtract": [{"$divide": [{"$toLong": {"$toDate": "$created_at"}}, 1000]}, HOT_EPOCH_SECONDS]},
+        HOT_DECAY_SECONDS,
+    ]
+}
+
+
+# hot_rank from the stored score and hot_base, falling back to created_at when hot_base is missing.
+_HOT_RANK = {
+    "$add": [
+        {"$multiply": [{"$cmp": ["$score", 0]}, {"$log10": {"$max": [{"$abs": "$score"}, 1]}}]},
+        {"$ifNull": ["$hot_base", _HOT_BASE_FROM_CREATED_AT]},
+    ]
+}
+
+
+def post_score_update(delta: int) -> List[Dict[str, Any]]:
+    """Update pipeline that adds `delta` to score and recomputes hot_rank from the new score in one atomic write."""
+    return [
+        {"$set": {"score": {"$add": [{"$ifNull": ["$score", 0]}, delta]}}},
+        {"$set": {"hot_rank": _HOT_RANK}},
+    ]
+
+
+async def backfill_hot_ranks(posts) -> int:
+    """Store score, hot_base and hot_rank on posts written before they existed; idempotent."""
+    result = await posts.update_many(
+        {"hot_rank": {"$exists": False}},
+        [
+            {"$set": {"score": {"$ifNull": ["$score", 0]}, "hot_base": {"$ifNull": ["$hot_base", _HOT_BASE_FROM_CREATED_AT]}}},
+            {"$set": {"hot_rank": _HOT_RANK}},
+        ],
+    )
+    return result.modified_count
@@ -0,0 +1,60 @@
+import html
+import re
+from typing import List
+
+SNIPPET_CHARS = 160
+
+_TOKEN = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def query_terms(query: str) -> List[str]:
+    """Plain terms of a Mongo $text query (quotes and negations stripped), longest first."""
+    terms = {term.lower() for term in _TOKEN.findall(query) if not query_has_negation(query, term)}
+    return sorted(terms, key=len, reverse=True)
+
+
+def query_has_negation(query: str, term: str) -> bool:
+    return re.search(rf"(^|\s)-{re.escape(term)}\b", query, re.IGNORECASE) is not None
+
+
+def snippet(text: str, terms: List[str], width: int = SNIPPET_CHARS) -> str:
+    """HTML-escaped window of `text` around the first matching term, with matches wrapped in <mark>.
+
+    Mongo stems terms, so a term also highlights words it is a prefix of ("run" -> "running").
+    """
+    text = " ".join((text or "").split())
+    if not terms:
+        return html.escape(text[:width])
+    pattern = re.compile(r"\b(" + "|".join(re.escape(term) for term in terms) + r")\w*", re.IGNORECASE)
+    first = pattern.search(text)
+    start = max(0, first.start() - width // 3) if first else 0
+    if start:
+        space = text.find(" ", start)
+        start = space + 1 if 0 <= space < (first.start() if first else width) else start
+    end = min(len(text), start + width)
+    window = text[start:end]
+
+    parts, last = [], 0
+    for match in pattern.finditer(window):
+        parts.append(html.escape(window[last : match.start()]))
+        parts.append(f"<mark>{html.escape(match.group(0))}</mark>")
+        last = match.end()
+    parts.append(html.escape(window[last:]))
+    return ("…" if start else "") + "".join(parts) + ("…" if end < len(text) else "")
+
+
+async def backfill_comment_communities(db) -> None:
+    """Copy community_id from the parent post onto comments written before comments stored it.
+
+    Until this runs such comments only turn up in searches without community_id. Idempotent: it
+    only touches comments without community_id.
+    """
+    await db.comments.aggregate(
+        [
+            {"$match": {"community_id": {"$exists": False}}},
+            {"$lookup": {"from": "posts", "localField": "post_id", "foreignField": "post_id", "as": "post"}},
+            {"$project": {"community_id": {"$first": "$post.community_id"}}},
+            {"$match": {"community_id": {"$ne": None}}},
+            {"$merge": {"into": "comments", "on": "_id", "whenMatched": "merge", "whenNotMatched": "discard"}},
+        ]
+    ).to_list(length=None)
@@ -7,6 +7,8 @@ from app.core.security import hash_password
 from app.db.models import Community, User
 from app.db.mongo import get_db
 from app.services.events import log_event
+from app.services.ranking import hot_base, hot_rank
+from app.services.threads import child_path
 
 
 async def seed_demo_data(session: Session) -> None:
@@ -39,6 +41,7 @@ async def seed_demo_data(session: Session) -> None:
     existing_posts = await db.posts.count_documents({})
     if existing_posts == 0:
         post_id = str(uuid.uuid4())
+        created_at = datetime.now(timezone.utc)
         post_doc = {
             "post_id": post_id,
             "community_id": community.id,
@@ -46,22 +49,29 @@ async def seed_demo_data(session: Session) -> None:
             "title": "Welcome to the demo feed",
             "body": "This seeded post shows up for the demo flow. Feel free to add more!",
             "media_keys": [],
-            "created_at": datetime.now(timezone.utc).isoformat(),
+            "created_at": created_at.isoformat(),
             "score": 0,
+            "hot_base": hot_base(created_at),
+            "hot_rank": hot_rank(0, created_at),
             "num_comments": 1,
         }
         await db.posts.insert_one(post_doc)
         log_event("seed_post", user.id, {"post_id": post_id, "community_id": community.id})
 
         comment_id = str(uuid.uuid4())
+        comment_created_at = datetime.now(timezone.utc)
         comment_doc = {
             "comment_id": comment_id,
             "post_id": post_id,
+            "community_id": community.id,
             "parent_comment_id": None,
             "author_user_id": user.id,
             "body": "Drop a comment to keep the conversation going.",
-            "created_at": datetime.now(timezone.utc).isoformat(),
+            "created_at": comment_created_at.isoformat(),
             "score": 0,
+            "path": child_path(None, comment_created_at, comment_id),
+            "depth": 0,
+            "reply_count": 0,
         }
         await db.comments.insert_one(comment_doc)
         log_event("seed_comment", user.id, {"comment_id": comment_id, "post_id": post_id})
@@ -0,0 +1,113 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+# Materialized paths: each comment's path is its parent's path plus one fixed-width
+# "<created_at>.<comment_id>" segment, so sorting by path yields a pre-order traversal
+# with replies in creation order and any subtree is one contiguous path range.
+PATH_SEPARATOR = "/"
+# Sorts after every character that can appear in a path segment.
+PATH_RANGE_END = "~"
+
+
+def path_segment(created_at: datetime, comment_id: str) -> str:
+    return f"{created_at.strftime('%Y%m%d%H%M%S%f')}.{comment_id}"
+
+
+def child_path(parent_path: Optional[str], created_at: datetime, comment_id: str) -> str:
+    segment = path_segment(created_at, comment_id)
+    return f"{parent_path}{PATH_SEPARATOR}{segment}" if parent_path else segment
+
+
+def path_depth(path: str) -> int:
+    return path.count(PATH_SEPARATOR)
+
+
+def build_tree(comments: List[Dict[str, Any]], max_depth: int) -> List[Dict[str, Any]]:
+    """Nest pre-ordered comments in one pass.
+
+    Comments whose parent is not in the list (the subtree root's parent, or a parent returned
+    on an earlier page) become top-level nodes; clients attach them via parent_comment_id.
+    """
+    nodes: Dict[str, Dict[str, Any]] = {}
+    roots: List[Dict[str, Any]] = []
+    for comment in comments:
+        node = {**comment, "replies": []}
+        node["has_more_replies"] = comment.get("depth", 0) >= max_depth and comment.get("reply_count", 0) > 0
+        nodes[comment["comment_id"]] = node
+        parent = nodes.get(comment.get("parent_comment_id"))
+        (parent["replies"] if parent else roots).append(node)
+    return roots
+
+
+
+def _thread_fields(comments: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """path, depth and reply_count for the comments of one post, derived from parent_comment_id.
+
+    Replies whose parent is not among `comments` get no entry and stay flat-list only.
+    """
+    by_id = {comment["comment_id"]: comment for comment in comments}
+    reply_counts: Dict[str, int] = {}
+    for comment in comments:
+        if comment.get("parent_comment_id"):
+            reply_counts[comment["parent_comment_id"]] = reply_counts.get(comment["parent_comment_id"], 0) + 1
+
+    paths: Dict[str, Optional[str]] = {}
+    for comment_id in by_id:
+        # Walk up to the first ancestor with a known path, then assign paths back down the chain.
+        chain: List[str] = []
+        while comment_id not in paths:
+            chain.append(comment_id)
+            parent_id = by_id[comment_id].get("parent_comment_id")
+            if not parent_id:
+                break
+            if parent_id not in by_id or parent_id in chain:
+                paths[parent_id] = None
+                break
+            comment_id = parent_id
+        for comment_id in reversed(chain):
+            comment = by_id[comment_id]
+            parent_id = comment.get("parent_comment_id")
+            parent_path = paths[parent_id] if parent_id else None
+            if parent_id and parent_path is None:
+                paths[comment_id] = None
+                continue
+            created_at = comment["created_at"]
+            if isinstance(created_at, str):
+                created_at = datetime.fromisoformat(created_at)
+            paths[comment_id] = child_path(parent_path, created_at, comment_id)
+
+    return {
+        comment_id: {"path": path, "depth": path_depth(path), "reply_count": reply_counts.get(comment_id, 0)}
+        for comment_id, path in paths.items()
+        if path is not None and comment_id in by_id
+    }
+
+
+async def backfill_comment_paths(comments) -> int:
+    """Store path, depth and reply_count on comments written before threading; idempotent.
+
+    Also repairs replies that were given a root path because their parent had none. All comments
+    of an affected post are loaded together, so every reply's path extends its parent's.
+    """
+    post_ids = await comments.distinct(
+        "post_id", {"$or": [{"path": {"$exists": False}}, {"parent_comment_id": {"$ne": None}, "depth": 0}]}
+    )
+    updated = 0
+    for post_id in post_ids:
+        docs = await comments.find(
+            {"post_id": post_id},
+            {"_id": 0, "comment_id": 1, "parent_comment_id": 1, "created_at": 1, "path": 1, "depth": 1, "reply_count": 1},
+        ).to_list(length=None)
+        fields = _thread_fields(docs)
+        writes = [
+            UpdateOne({"comment_id": doc["comment_id"]}, {"$set": fields[doc["comment_id"]]})
+            for doc in docs
+            if doc["comment_id"] in fields
+            and any(doc.get(key) != value for key, value in fields[doc["comment_id"]].items())
+        ]
+        if writes:
+            result = await comments.bulk_write(writes, ordered=False)
+            updated += result.modified_count
+    return updated
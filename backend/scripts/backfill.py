@@ -0,0 +1,58 @@
+"""Fill in fields that documents written before a release do not have yet; safe to re-run.
+
+    docker compose exec api python -m scripts.backfill              # every step, in order
+    docker compose exec api python -m scripts.backfill hot_ranks    # just the named steps
+
+Each step finds its documents by a missing field, which no index covers, so it scans the whole
+collection. That is why these run once after an upgrade instead of on every API startup.
+"""
+import argparse
+import asyncio
+
+from app.db.mongo import get_db
+from app.services.ranking import backfill_hot_ranks
+from app.services.search import backfill_comment_communities
+from app.services.threads import backfill_comment_paths
+
+
+async def hot_ranks(db) -> int | None:
+    """Posts without score/hot_base/hot_rank sort last under ?sort=hot until this runs."""
+    return await backfill_hot_ranks(db.posts)
+
+
+async def comment_paths(db) -> int | None:
+    """Comments without a path are missing from /comments/tree and refuse replies until this runs."""
+    return await backfill_comment_paths(db.comments)
+
+
+async def comment_communities(db) -> int | None:
+    """Comments without community_id are left out of community-filtered searches until this runs."""
+    await backfill_comment_communities(db)
+
+
+STEPS = {
+    "hot_ranks": hot_ranks,
+    "comment_paths": comment_paths,
+    "comment_communities": comment_communities,
+}
+
+
+async def run(steps: list[str]) -> None:
+    db = get_db()
+    for name in steps:
+        updated = await STEPS[name](db)
+        print(f"{name:20} {'done' if updated is None else f'{updated} documents updated'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill fields on documents written by older releases.")
+    parser.add_argument("steps", nargs="*", help=f"Steps to run, in order (default: all of {', '.join(STEPS)})")
+    args = parser.parse_args()
+    unknown = [name for name in args.steps if name not in STEPS]
+    if unknown:
+        parser.error(f"unknown steps: {', '.join(unknown)}")
+    asyncio.run(run(args.steps or list(STEPS)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,445 @@
+"""Per-route latency and allocation benchmark with a query-plan check and a local baseline.
+
+Boots app.main.app in-process (httpx ASGITransport, no network) against SQLite for Postgres and
+a moto S3 server for MinIO. Mongo is a real mongod when BENCH_MONGO_URL is set (a throwaway
+bench_<pid> database, dropped afterwards) and mongomock-motor otherwise. It preloads
+BENCH_SCALE-sized data, then times every case sequentially and measures the peak Python
+allocation per request with tracemalloc.
+
+    pip install -r requirements-bench.txt
+    docker run -d --rm -p 27017:27017 mongo:7
+    export BENCH_MONGO_URL=mongodb://localhost:27017
+    python -m scripts.bench_endpoints --save-baseline      # record the baseline, e.g. on main
+    python -m scripts.bench_endpoints                      # compare against it
+    python -m scripts.bench_endpoints --only posts,comments
+
+With a mongod, every ROUTER_QUERIES shape is explained against the loaded data first, and any
+COLLSCAN or blocking SORT fails the run; that catches index regressions without relying on
+wall-clock time. mongomock cannot explain, so that check and the cases that need server-only
+operators ($topN, $text) are skipped there, and its timings are mostly its own in-Python scans.
+
+Latencies are compared as multiples of a calibration request (GET /, framework overhead only),
+sampled before every case and averaged over the run by median, which cancels out most of the
+machine and its current load. A case regresses when it grows past the larger of --threshold and
+three times its run-to-run spread across --rounds. Baselines are not committed: --save-baseline
+records one under .bench/ (or BENCH_BASELINE / --baseline), and later runs with the same Mongo
+backend and scale compare against it. In CI, point BENCH_BASELINE at a cached path that a run on
+the main branch refreshes with --save-baseline. Exits 1 on failing cases, plan problems,
+regressions, or a missing baseline when --save-baseline is not given, so a fresh checkout
+cannot pass without comparing anything.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+BASELINE_PATH = os.getenv(
+    "BENCH_BASELINE", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".bench", "baseline.json")
+)
+SCALE = float(os.getenv("BENCH_SCALE", "1"))
+MONGO_URL = os.getenv("BENCH_MONGO_URL", "")
+# Cases whose routes use operators mongomock does not implement.
+MONGOD_ONLY = {"comments.preview", "search.posts", "search.all", "search.comments"}
+# Latencies are divided by the latency of GET / (routing and middleware only), sampled before every
+# case so the yardstick covers the whole run rather than whatever the machine did at its start.
+CALIBRATION_ROUNDS = 3
+CALIBRATION_REQUESTS = 40
+PASSWORD = "bench-password"
+
+
+def configure_environment(workdir: str, s3_endpoint: str) -> None:
+    """Point app.core.config at the stand-ins; must run before anything under app is imported."""
+    os.environ.update(
+        {
+            "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+            "RESET_DB_ON_STARTUP": "true",
+            "MONGO_URL": MONGO_URL or "mongodb://bench.invalid:27017",
+            "MONGO_DB": f"bench_{os.getpid()}",
+            "MINIO_ENDPOINT": s3_endpoint,
+            "MINIO_PUBLIC_ENDPOINT": s3_endpoint,
+            "MINIO_ACCESS_KEY": "bench",
+            "MINIO_SECRET_KEY": "bench-secret",
+            "MINIO_BUCKET": "bench-media",
+            "MEDIA_CACHE_DIR": "",
+            "EVENT_LOG_DIR": os.path.join(workdir, "events"),
+            "PASSWORD_HASH_ROUNDS": os.getenv("PASSWORD_HASH_ROUNDS", "29000"),
+        }
+    )
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+
+def start_s3_emulator():
+    """moto's S3 server in a child process, so its work stays out of the timings and tracemalloc."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = subprocess.Popen(
+        [sys.executable, "-m", "moto.server", "-H", "127.0.0.1", "-p", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            break
+        except OSError:
+            if server.poll() is not None or time.monotonic() > deadline:
+                server.kill()
+                raise RuntimeError("moto S3 server did not start; pip install -r requirements-bench.txt")
+            time.sleep(0.1)
+    return server, f"http://127.0.0.1:{port}"
+
+
+async def preload(rng: random.Random) -> dict:
+    """Fill SQLite, the Mongo stand-in and S3 with BENCH_SCALE-sized data; returns ids for the cases."""
+    from sqlmodel import Session
+
+    from app.core.security import create_access_token, hash_password
+    from app.db.models import Community, CommunityMembership, User
+    from app.db.mongo import get_db
+    from app.db.postgres import create_tables, engine
+    from app.routers.comments import CommentIn, _new_comment_doc
+    from app.routers.posts import PostIn, _new_post_doc
+    from app.services.minio_service import ensure_bucket, put_object
+
+    n_users = max(10, int(200 * SCALE))
+    n_communities = max(5, int(50 * SCALE))
+    n_posts = max(50, int(5000 * SCALE))
+    n_comments = max(100, int(20000 * SCALE))
+
+    create_tables()
+    password_hash = hash_password(PASSWORD)
+    with Session(engine, expire_on_commit=False) as session:
+        users = [
+            User(username=f"bench{i}", email=f"bench{i}@example.com", display_name=f"Bench {i}", password_hash=password_hash)
+            for i in range(n_users)
+        ]
+        session.add_all(users)
+        session.commit()
+        communities = [
+            Community(name=f"bench-{i:04d}", description=f"Benchmark community {i}", created_by_user_id=users[i % n_users].id)
+            for i in range(n_communities)
+        ]
+        session.add_all(communities)
+        session.commit()
+        memberships = {}
+        for user in users:
+            joined = rng.sample(communities, k=min(len(communities), 5))
+            memberships[user.id] = [c.id for c in joined]
+            session.add_all(CommunityMembership(user_id=user.id, community_id=c.id) for c in joined)
+        session.commit()
+        community_ids = [c.id for c in communities]
+
+    db = get_db()
+    base = datetime.now(timezone.utc) - timedelta(days=7)
+    posts = []
+    for i in range(n_posts):
+        author = rng.choice(users)
+        data = PostIn(community_id=rng.choice(memberships[author.id]), title=f"Post {i} about benchmarks", body="lorem ipsum " * 40)
+        doc = _new_post_doc(data, author, base + timedelta(seconds=i * 60))
+        doc["score"] = rng.randint(-5, 500)
+        posts.append(doc)
+    await db.posts.insert_many(posts)
+
+    posts_by_id = {p["post_id"]: p for p in posts}
+    comments = []
+    for i in range(n_comments):
+        post = rng.choice(posts)
+        parent = rng.choice(comments[-50:]) if comments and rng.random() < 0.5 else None
+        if parent is not None and parent["post_id"] != post["post_id"]:
+            post = posts_by_id[parent["post_id"]]
+        data = CommentIn(post_id=post["post_id"], body="comment text " * 10, parent_comment_id=parent["comment_id"] if parent else None)
+        created_at = datetime.fromisoformat(post["created_at"]) + timedelta(seconds=i)
+        comments.append(
+            _new_comment_doc(data, rng.choice(users), post["community_id"], parent["path"] if parent else None, created_at)
+        )
+    await db.comments.insert_many(comments)
+
+    ensure_bucket()
+    media_keys = [f"media/bench/{i}.png" for i in range(20)]
+    for key in media_keys:
+        put_object(key, os.urandom(64 * 1024), "image/png")
+
+    me = users[0]
+    # The busiest thread in a community `me` belongs to, so comments.create is allowed there.
+    my_comments = (c["post_id"] for c in comments if c["community_id"] in memberships[me.id])
+    busiest = Counter(my_comments).most_common(1)[0][0]
+    return {
+        "me": me,
+        "token": create_access_token(str(me.id)),
+        "my_community": memberships[me.id][0],
+        "community_ids": community_ids,
+        "post_ids": [p["post_id"] for p in posts],
+        "busy_post": busiest,
+        "media_keys": media_keys,
+        "counts": {"users": n_users, "communities": n_communities, "posts": n_posts, "comments": n_comments},
+    }
+
+
+def build_cases(ctx: dict) -> list:
+    """(name, router, iterations, method, path(i), request kwargs(i)); all cases expect a 2xx."""
+    auth = {"Authorization": f"Bearer {ctx['token']}"}
+    rng = random.Random(7)
+    post = lambda i: ctx["post_ids"][i % len(ctx["post_ids"])]
+    return [
+        ("auth.login", "auth", 20, "POST", lambda i: "/auth/login", lambda i: {"json": {"username": "bench1", "password": PASSWORD}}),
+        ("auth.register", "auth", 20, "POST", lambda i: "/auth/register",
+         lambda i: {"json": {"username": f"new{i}_{rng.getrandbits(32):x}", "email": f"new{i}_{rng.getrandbits(32):x}@example.com", "password": PASSWORD}}),
+        ("communities.list", "communities", 100, "GET", lambda i: "/communities", lambda i: {}),
+        ("communities.directory", "communities", 200, "GET", lambda i: "/communities/directory", lambda i: {"params": {"limit": 50}}),
+        ("communities.search", "communities", 200, "GET", lambda i: "/communities/search", lambda i: {"params": {"prefix": "bench-00"}}),
+        ("posts.list_new", "posts", 200, "GET", lambda i: f"/communities/{ctx['community_ids'][i % len(ctx['community_ids'])]}/posts", lambda i: {}),
+        ("posts.list_top", "posts", 200, "GET", lambda i: f"/communities/{ctx['community_ids'][i % len(ctx['community_ids'])]}/posts", lambda i: {"params": {"sort": "top"}}),
+        ("posts.feed", "posts", 200, "GET", lambda i: "/feed", lambda i: {"headers": auth}),
+        ("posts.get", "posts", 200, "GET", lambda i: f"/posts/{post(i)}", lambda i: {}),
+        ("posts.create", "posts", 100, "POST", lambda i: "/posts",
+         lambda i: {"headers": auth, "json": {"community_id": ctx["my_community"], "title": f"bench {i}", "body": "body"}}),
+        ("comments.list", "comments", 200, "GET", lambda i: f"/posts/{ctx['busy_post']}/comments", lambda i: {}),
+        ("comments.tree", "comments", 200, "GET", lambda i: f"/posts/{ctx['busy_post']}/comments/tree", lambda i: {}),
+        ("comments.preview", "comments", 20, "POST", lambda i: "/posts/comments/preview",
+         lambda i: {"json": {"post_ids": ctx["post_ids"][(i * 20) % len(ctx["post_ids"]):][:20]}}),
+        ("search.posts", "search", 100, "GET", lambda i: "/search",
+         lambda i: {"params": {"q": "benchmarks lorem", "community_id": ctx["my_community"], "type": "posts"}}),
+        ("search.all", "search", 100, "GET", lambda i: "/search", lambda i: {"params": {"q": "benchmarks lorem"}}),
+        ("search.comments", "search", 100, "GET", lambda i: "/search",
+         lambda i: {"params": {"q": "comment text", "community_id": ctx["my_community"], "type": "comments"}}),
+        ("comments.create", "comments", 100, "POST", lambda i: "/comments",
+         lambda i: {"headers": auth, "json": {"post_id": ctx["busy_post"], "body": f"bench comment {i}"}}),
+        ("media.upload", "media", 30, "POST", lambda i: "/media/upload",
+         lambda i: {"headers": auth, "files": {"file": ("bench.png", os.urandom(256 * 1024), "image/png")}}),
+        ("media.get", "media", 100, "GET", lambda i: f"/media/{ctx['media_keys'][i % len(ctx['media_keys'])]}", lambda i: {}),
+        ("media.presign_batch", "media", 100, "POST", lambda i: "/media/presign/batch", lambda i: {"headers": auth, "json": {"keys": ctx["media_keys"]}}),
+        ("users.me", "users", 200, "GET", lambda i: "/users/me", lambda i: {"headers": auth}),
+        ("users.my_communities", "users", 200, "GET", lambda i: "/users/me/communities", lambda i: {"headers": auth}),
+        ("users.update_me", "users", 50, "PATCH", lambda i: "/users/me", lambda i: {"headers": auth, "json": {"display_name": f"Bench {i}"}}),
+    ]
+
+
+async def run_case(client, case, alloc_iterations: int, rounds: int) -> dict:
+    name, router, iterations, method, path, kwargs = case
+    iterations = max(5, int(iterations * float(os.getenv("BENCH_ITERATIONS_SCALE", "1"))))
+    failures = []
+
+    async def once(i: int) -> float:
+        start = time.perf_counter()
+        response = await client.request(method, path(i), **kwargs(i))
+        elapsed = time.perf_counter() - start
+        if response.status_code >= 300:
+            failures.append(f"{response.status_code} {response.text[:120]}")
+        return elapsed
+
+    for i in range(min(5, iterations)):
+        await once(-1 - i)
+    # The reported p50 is the best of `rounds` medians, which filters out runs that hit a noisy moment;
+    # how far the medians disagree is the case's run-to-run spread.
+    medians, latencies = [], []
+    per_round = max(5, iterations // rounds)
+    for r in range(rounds):
+        sample = [await once(r * per_round + i) for i in range(per_round)]
+        medians.append(statistics.median(sample))
+        latencies.extend(sample)
+    latencies.sort()
+    iterations = len(latencies)
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for i in range(alloc_iterations):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            await once(10 * iterations + i)
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "router": router,
+        "iterations": iterations,
+        "p50_ms": round(min(medians) * 1000, 3),
+        "spread": round((max(medians) - min(medians)) / min(medians), 3),
+        "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "alloc_peak_kib": round(statistics.median(peaks) / 1024, 1) if peaks else 0.0,
+        "failures": failures[:3],
+        "failed": len(failures),
+    }
+
+
+async def calibrate(client) -> float:
+    """Best median latency of GET / in ms: how fast this machine runs framework code right now."""
+    medians = []
+    for _ in range(CALIBRATION_ROUNDS):
+        sample = []
+        for _ in range(CALIBRATION_REQUESTS):
+            start = time.perf_counter()
+            await client.get("/")
+            sample.append(time.perf_counter() - start)
+        medians.append(statistics.median(sample))
+    return min(medians) * 1000
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Cases whose relative p50 or peak allocation grew past their tolerance over the baseline.
+
+    The latency tolerance is the larger of `threshold` and three times the worse of the two runs'
+    spreads, so a case is only flagged for growth its own round-to-round noise cannot explain.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("cases", {}).get(name)
+        if not base:
+            continue
+        tolerance = max(threshold, 3 * max(base["spread"], result["spread"]))
+        # Small values are noisy in absolute terms; only flag growth past a floor as well.
+        for metric, allowed, floor in (("p50_rel", tolerance, 1.0), ("alloc_peak_kib", threshold, 16.0)):
+            limit = max(base[metric] * (1 + allowed), base[metric] + floor)
+            if result[metric] > limit:
+                regressions.append(f"{name}: {metric} {result[metric]} > {limit:.2f} (baseline {base[metric]})")
+    return regressions
+
+
+def baseline_mismatch(report: dict, baseline: dict) -> str | None:
+    for key in ("mongo", "scale"):
+        if report["env"].get(key) != baseline.get("env", {}).get(key):
+            return f"{key} is {report['env'].get(key)!r} here but {baseline.get('env', {}).get(key)!r} in the baseline"
+    return None
+
+
+async def run(args: argparse.Namespace, workdir: str) -> dict:
+    import httpx
+
+    import app.db.mongo as mongo
+
+    if not MONGO_URL:
+        from mongomock_motor import AsyncMongoMockClient
+
+        mongo._client = AsyncMongoMockClient()
+    from app.main import app
+    from app.services.events import shutdown_event_writer
+
+    try:
+        if MONGO_URL:
+            await mongo.ensure_indexes()
+        ctx = await preload(random.Random(args.seed))
+        plan_problems = None
+        if MONGO_URL:
+            plan_problems = await mongo.find_plan_problems()
+            for name, stage in plan_problems.items():
+                print(f"PLAN {name}: {stage}", file=sys.stderr)
+
+        cases = build_cases(ctx)
+        if not MONGO_URL:
+            print(f"mongomock: skipping {', '.join(sorted(MONGOD_ONLY))} and the query-plan check (set BENCH_MONGO_URL)")
+            cases = [c for c in cases if c[0] not in MONGOD_ONLY]
+        if args.only:
+            wanted = set(args.only.split(","))
+            cases = [c for c in cases if c[1] in wanted or c[0] in wanted]
+
+        results = {}
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            calibrations = []
+            for case in cases:
+                calibrations.append(await calibrate(client))
+                result = await run_case(client, case, args.alloc_iterations, args.rounds)
+                results[case[0]] = result
+                status = f"{result['failed']} FAILED" if result["failed"] else "ok"
+                print(
+                    f"{case[0]:<26} p50={result['p50_ms']:>9.3f}ms ±{result['spread']:>6.1%} "
+                    f"p95={result['p95_ms']:>9.3f}ms alloc={result['alloc_peak_kib']:>9.1f}KiB  {status}"
+                )
+        calibration_ms = statistics.median(calibrations)
+        for result in results.values():
+            result["p50_rel"] = round(result["p50_ms"] / calibration_ms, 3)
+    finally:
+        shutdown_event_writer()
+        if MONGO_URL:
+            await mongo.get_client().drop_database(mongo.get_db().name)
+    return {
+        "env": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "host": platform.node(),
+            "mongo": "mongod" if MONGO_URL else "mongomock",
+            "scale": SCALE,
+            "calibration_ms": round(calibration_ms, 3),
+        },
+        "data": ctx["counts"],
+        "plan_problems": plan_problems,
+        "cases": results,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", default=BASELINE_PATH,
+                        help="Baseline to compare with or save to (default: $BENCH_BASELINE or .bench/baseline.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=float(os.getenv("BENCH_THRESHOLD", "0.25")),
+                        help="Least relative growth that counts as a regression; noisy cases get more")
+    parser.add_argument("--only", help="Comma-separated routers or case names")
+    parser.add_argument("--rounds", type=int, default=5, help="Timed rounds per case; p50 is the best round median")
+    parser.add_argument("--alloc-iterations", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Also write this run's JSON report here")
+    args = parser.parse_args()
+    if args.rounds < 2:
+        parser.error("--rounds must be at least 2 to measure the run-to-run spread")
+    if not args.save_baseline and not os.path.exists(args.baseline):
+        parser.error(f"no baseline at {args.baseline}; record one with --save-baseline or point BENCH_BASELINE at one")
+
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    server, endpoint = start_s3_emulator()
+    configure_environment(workdir, endpoint)
+    try:
+        report = asyncio.run(run(args, workdir))
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    failed = [name for name, r in report["cases"].items() if r["failed"]]
+    for name in failed:
+        print(f"FAILED {name}: {report['cases'][name]['failures']}", file=sys.stderr)
+    broken = bool(failed or report["plan_problems"])
+
+    if args.save_baseline:
+        if broken:
+            print("Not saving a baseline from a run with failing cases or plan problems.", file=sys.stderr)
+            return 1
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"Baseline written to {args.baseline}; later runs compare against it.")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as fh:
+        baseline = json.load(fh)
+    mismatch = baseline_mismatch(report, baseline)
+    if mismatch:
+        print(f"Cannot compare with {args.baseline}: {mismatch}. Re-record it with --save-baseline.", file=sys.stderr)
+        return 1
+    regressions = compare(report["cases"], baseline, args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    if not regressions and not broken:
+        print(f"No regressions against {args.baseline} (tolerance >= {args.threshold:.0%}, widened by spread)")
+    return 1 if regressions or broken else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
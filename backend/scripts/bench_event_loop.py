@@ -0,0 +1,74 @@
+"""Measure event-loop lag while concurrent Postgres queries run through the sync and async paths.
+
+A ticker task sleeps for a short interval in a loop and records how late it wakes up. Queries
+run through the blocking SQLModel Session stall the loop for their whole duration; queries run
+through the AsyncSession only await the network, so the ticker keeps its schedule.
+
+    docker compose exec api python -m scripts.bench_event_loop
+"""
+import asyncio
+import os
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db.postgres import async_engine, engine
+
+CONCURRENCY = int(os.getenv("BENCH_CONCURRENCY", "50"))
+ROUNDS = int(os.getenv("BENCH_ROUNDS", "5"))
+QUERY_SECONDS = float(os.getenv("BENCH_QUERY_SECONDS", "0.02"))
+TICK_SECONDS = 0.005
+
+SLOW_QUERY = text("SELECT pg_sleep(:seconds)")
+
+
+async def ticker(stop: asyncio.Event, lags: list[float]) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK_SECONDS)
+        lags.append(time.perf_counter() - start - TICK_SECONDS)
+
+
+async def sync_query() -> None:
+    with Session(engine) as session:
+        session.exec(SLOW_QUERY, params={"seconds": QUERY_SECONDS})
+
+
+async def async_query() -> None:
+    async with AsyncSession(async_engine) as session:
+        await session.exec(SLOW_QUERY, params={"seconds": QUERY_SECONDS})
+
+
+async def measure(name: str, query) -> None:
+    lags: list[float] = []
+    stop = asyncio.Event()
+    tick = asyncio.create_task(ticker(stop, lags))
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        await asyncio.gather(*(query() for _ in range(CONCURRENCY)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await tick
+
+    lags.sort()
+    p99 = lags[int(len(lags) * 0.99) - 1] if lags else 0.0
+    print(
+        f"{name:6} queries={CONCURRENCY * ROUNDS:5} wall={elapsed:6.2f}s "
+        f"qps={CONCURRENCY * ROUNDS / elapsed:8.1f} ticks={len(lags):5} "
+        f"loop_lag_median={statistics.median(lags or [0]) * 1000:7.2f}ms "
+        f"p99={p99 * 1000:7.2f}ms max={(lags[-1] if lags else 0) * 1000:7.2f}ms"
+    )
+
+
+async def main() -> None:
+    print(f"concurrency={CONCURRENCY} rounds={ROUNDS} query={QUERY_SECONDS * 1000:.0f}ms tick={TICK_SECONDS * 1000:.0f}ms")
+    await measure("sync", sync_query)
+    await measure("async", async_query)
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
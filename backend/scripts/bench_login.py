@@ -0,0 +1,177 @@
+"""Measure login throughput and the latency of unrelated sync routes while logins are saturated.
+
+Login workers hammer POST /auth/login while a probe loop times GET /communities (a sync route
+served from FastAPI's threadpool). With hashing in the dedicated process pool the probe latency
+should stay close to its idle baseline; with hashing in the threadpool it climbs with the login
+load.
+
+    python scripts/bench_login.py            # against http://localhost:8000
+    BENCH_API_URL=http://api:8000 BENCH_LOGIN_CONCURRENCY=64 python scripts/bench_login.py
+    python scripts/bench_login.py --compare  # before/after: boots the API twice on BENCH_COMPARE_PORT
+
+--compare starts uvicorn with this process's environment (so it needs the same DATABASE_URL and
+MONGO_URL as the API, and never resets the database): first with PASSWORD_HASH_WORKERS=0, which
+hashes on the threadpool as before the process pool existed, then with the configured pool size.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+API_URL = os.getenv("BENCH_API_URL", "http://localhost:8000").rstrip("/")
+LOGIN_CONCURRENCY = int(os.getenv("BENCH_LOGIN_CONCURRENCY", "32"))
+DURATION_SECONDS = float(os.getenv("BENCH_DURATION_SECONDS", "15"))
+PROBE_PATH = os.getenv("BENCH_PROBE_PATH", "/communities")
+COMPARE_PORT = int(os.getenv("BENCH_COMPARE_PORT", "8765"))
+PROBE_INTERVAL_SECONDS = 0.05
+PASSWORD = "bench-password"
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def register_user(api_url: str) -> str:
+    username = f"bench_{uuid.uuid4().hex[:10]}"
+    resp = requests.post(
+        f"{api_url}/auth/register",
+        json={"username": username, "email": f"{username}@example.com", "password": PASSWORD},
+        timeout=30,
+    )
+    resp.raise_for_status()
+    return username
+
+
+def probe(api_url: str, stop: threading.Event, latencies: list[float]) -> None:
+    with requests.Session() as http:
+        while not stop.is_set():
+            start = time.perf_counter()
+            http.get(f"{api_url}{PROBE_PATH}", timeout=30).raise_for_status()
+            latencies.append(time.perf_counter() - start)
+            time.sleep(PROBE_INTERVAL_SECONDS)
+
+
+def login_worker(api_url: str, username: str, stop: threading.Event, latencies: list[float], errors: list[int]) -> None:
+    with requests.Session() as http:
+        while not stop.is_set():
+            start = time.perf_counter()
+            resp = http.post(f"{api_url}/auth/login", json={"username": username, "password": PASSWORD}, timeout=60)
+            if resp.status_code == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors.append(resp.status_code)
+
+
+def run_probe_only(api_url: str, seconds: float) -> list[float]:
+    stop, latencies = threading.Event(), []
+    thread = threading.Thread(target=probe, args=(api_url, stop, latencies))
+    thread.start()
+    time.sleep(seconds)
+    stop.set()
+    thread.join()
+    return latencies
+
+
+def report(label: str, latencies: list[float]) -> None:
+    print(
+        f"{label:<26} n={len(latencies):<6} p50={percentile(latencies, 50) * 1000:8.1f}ms "
+        f"p99={percentile(latencies, 99) * 1000:8.1f}ms"
+    )
+
+
+def measure(api_url: str) -> dict:
+    username = register_user(api_url)
+    baseline = run_probe_only(api_url, min(5.0, DURATION_SECONDS))
+
+    stop = threading.Event()
+    login_latencies: list[float] = []
+    probe_latencies: list[float] = []
+    errors: list[int] = []
+    probe_thread = threading.Thread(target=probe, args=(api_url, stop, probe_latencies))
+    with ThreadPoolExecutor(max_workers=LOGIN_CONCURRENCY) as pool:
+        started = time.perf_counter()
+        for _ in range(LOGIN_CONCURRENCY):
+            pool.submit(login_worker, api_url, username, stop, login_latencies, errors)
+        probe_thread.start()
+        time.sleep(DURATION_SECONDS)
+        stop.set()
+    probe_thread.join()
+    elapsed = time.perf_counter() - started
+
+    print(f"logins: {len(login_latencies) / elapsed:.1f}/s over {elapsed:.1f}s ({LOGIN_CONCURRENCY} clients, {len(errors)} errors)")
+    report("login", login_latencies)
+    report(f"{PROBE_PATH} idle", baseline)
+    report(f"{PROBE_PATH} under load", probe_latencies)
+    slowdown = None
+    if baseline and probe_latencies:
+        slowdown = percentile(probe_latencies, 99) / max(percentile(baseline, 99), 1e-6)
+        print(f"probe p99 slowdown: {slowdown:.1f}x")
+    print(f"mean login: {statistics.fmean(login_latencies) * 1000:.1f}ms" if login_latencies else "no successful logins")
+    return {
+        "logins_per_second": len(login_latencies) / elapsed,
+        "probe_p99_ms": percentile(probe_latencies, 99) * 1000,
+        "probe_slowdown": slowdown,
+    }
+
+
+def serve(hash_workers: str) -> subprocess.Popen:
+    """uvicorn on COMPARE_PORT with the given PASSWORD_HASH_WORKERS; returns once it answers."""
+    env = {**os.environ, "PASSWORD_HASH_WORKERS": hash_workers, "RESET_DB_ON_STARTUP": "false"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(COMPARE_PORT)],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    deadline = time.monotonic() + 60
+    while True:
+        try:
+            requests.get(f"http://127.0.0.1:{COMPARE_PORT}/", timeout=1).raise_for_status()
+            return server
+        except requests.RequestException:
+            if server.poll() is not None or time.monotonic() > deadline:
+                server.kill()
+                raise RuntimeError(f"API did not start on port {COMPARE_PORT}")
+            time.sleep(0.5)
+
+
+def compare() -> None:
+    pool_workers = os.getenv("PASSWORD_HASH_WORKERS", "2")
+    results = {}
+    for label, hash_workers in (("threadpool", "0"), (f"process pool ({pool_workers})", pool_workers)):
+        print(f"\n== hashing in the {label} ==")
+        server = serve(hash_workers)
+        try:
+            results[label] = measure(f"http://127.0.0.1:{COMPARE_PORT}")
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    print(f"\n{'hashing':<22} {'logins/s':>9} {PROBE_PATH + ' p99':>18} {'p99 slowdown':>13}")
+    for label, result in results.items():
+        slowdown = f"{result['probe_slowdown']:.1f}x" if result["probe_slowdown"] is not None else "-"
+        print(f"{label:<22} {result['logins_per_second']:>9.1f} {result['probe_p99_ms']:>16.1f}ms {slowdown:>13}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--compare", action="store_true", help="measure threadpool hashing, then the process pool")
+    args = parser.parse_args()
+    if args.compare:
+        compare()
+    else:
+        measure(API_URL)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+import asyncio
+import sys
+
+from app.db.mongo import ROUTER_QUERIES, ensure_indexes, find_plan_problems
+
+
+async def run() -> int:
+    await ensure_indexes()
+    problems = await find_plan_problems()
+    for name, collection, _, _ in ROUTER_QUERIES:
+        print(f"{name:30} {collection:10} {problems.get(name, 'ok')}")
+    if problems:
+        print(f"\n{len(problems)} router queries scan the collection or sort in memory: {', '.join(problems)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run()))
@@ -0,0 +1,174 @@
+"""Compact closed JSONL day files into Parquet segments partitioned by day and event type.
+
+Layout: EVENT_SEGMENT_DIR/day=YYYY-MM-DD/type=<event type>/part-0.parquet, plus a
+day=YYYY-MM-DD/_SUCCESS marker once the whole day has been written.
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+EVENT_DIR = os.getenv("EVENT_LOG_DIR", "/datalake/events")
+SEGMENT_DIR = os.getenv("EVENT_SEGMENT_DIR", os.path.join(os.path.dirname(EVENT_DIR.rstrip("/")), "segments"))
+
+# Day files must be idle this long before compaction so buffered writes have landed.
+CLOSED_GRACE_SECONDS = int(os.getenv("EVENT_COMPACT_GRACE_SECONDS", "300"))
+
+# Payload keys promoted to typed columns; anything else is kept as JSON in `extra`.
+PAYLOAD_COLUMNS = {
+    "post_id": "string",
+    "comment_id": "string",
+    "community_id": "int64",
+    "username": "string",
+    "key": "string",
+    "content_type": "string",
+    "bytes": "int64",
+    "has_media": "bool",
+    "is_reply": "bool",
+}
+
+
+def day_dir(day: str) -> str:
+    return os.path.join(SEGMENT_DIR, f"day={day}")
+
+
+def compacted_days() -> set[str]:
+    if not os.path.isdir(SEGMENT_DIR):
+        return set()
+    days = set()
+    for name in os.listdir(SEGMENT_DIR):
+        if name.startswith("day=") and os.path.exists(os.path.join(SEGMENT_DIR, name, "_SUCCESS")):
+            days.add(name[len("day="):])
+    return days
+
+
+def segment_files(day: str):
+    """Yield (event type, parquet path) for every partition of a compacted day."""
+    root = day_dir(day)
+    for name in sorted(os.listdir(root)):
+        if not name.startswith("type="):
+            continue
+        type_dir = os.path.join(root, name)
+        for fn in sorted(os.listdir(type_dir)):
+            if fn.endswith(".parquet"):
+                yield name[len("type="):], os.path.join(type_dir, fn)
+
+
+def closed_day_files() -> list[str]:
+    if not os.path.isdir(EVENT_DIR):
+        return []
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    cutoff = time.time() - CLOSED_GRACE_SECONDS
+    days = []
+    for fn in sorted(os.listdir(EVENT_DIR)):
+        if not fn.endswith(".jsonl"):
+            continue
+        day = fn[: -len(".jsonl")]
+        if day < today and os.path.getmtime(os.path.join(EVENT_DIR, fn)) < cutoff:
+            days.append(day)
+    return days
+
+
+def _schema():
+    import pyarrow as pa
+
+    kinds = {"string": pa.string(), "int64": pa.int64(), "bool": pa.bool_()}
+    fields = [
+        pa.field("ts", pa.timestamp("us", tz="UTC")),
+        pa.field("type", pa.dictionary(pa.int32(), pa.string())),
+        pa.field("actor_user_id", pa.int64()),
+    ]
+    fields += [pa.field(name, kinds[kind]) for name, kind in PAYLOAD_COLUMNS.items()]
+    fields.append(pa.field("extra", pa.string()))
+    return pa.schema(fields)
+
+
+def _typed(value, kind: str):
+    if kind == "string":
+        return value if isinstance(value, str) else None
+    if kind == "bool":
+        return value if isinstance(value, bool) else None
+    if isinstance(value, bool) or not isinstance(value, int):
+        return None
+    return value
+
+
+def _row(event: dict) -> dict | None:
+    try:
+        ts = datetime.fromisoformat(event["ts"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    actor = event.get("actor_user_id")
+    row = {"ts": ts, "type": event.get("type"), "actor_user_id": _typed(actor, "int64")}
+    payload = event.get("payload") if isinstance(event.get("payload"), dict) else {}
+    extra = {}
+    for key, value in payload.items():
+        kind = PAYLOAD_COLUMNS.get(key)
+        typed = _typed(value, kind) if kind else None
+        if typed is None and value is not None:
+            extra[key] = value
+    for key, kind in PAYLOAD_COLUMNS.items():
+        row[key] = _typed(payload.get(key), kind)
+    row["extra"] = json.dumps(extra, ensure_ascii=False) if extra else None
+    return row
+
+
+def compact_day(day: str, force: bool = False) -> int:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    target = day_dir(day)
+    if not force and os.path.exists(os.path.join(target, "_SUCCESS")):
+        return 0
+
+    schema = _schema()
+    columns_by_type: dict[str, dict[str, list]] = defaultdict(lambda: {name: [] for name in schema.names})
+    total = 0
+    with open(os.path.join(EVENT_DIR, f"{day}.jsonl"), "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = _row(json.loads(line))
+            except ValueError:
+                row = None
+            if row is None or not isinstance(row["type"], str) or "/" in row["type"]:
+                continue
+            columns = columns_by_type[row["type"]]
+            for name in schema.names:
+                columns[name].append(row[name])
+            total += 1
+
+    tmp = f"{target}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    for event_type, columns in columns_by_type.items():
+        type_dir = os.path.join(tmp, f"type={event_type}")
+        os.makedirs(type_dir, exist_ok=True)
+        table = pa.table(columns, schema=schema).sort_by("ts")
+        pq.write_table(table, os.path.join(type_dir, "part-0.parquet"), compression="zstd")
+    os.makedirs(tmp, exist_ok=True)
+    open(os.path.join(tmp, "_SUCCESS"), "w").close()
+
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp, target)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("days", nargs="*", help="Days to compact (default: every closed day file)")
+    parser.add_argument("--force", action="store_true", help="Rewrite days that are already compacted")
+    args = parser.parse_args()
+
+    for day in args.days or closed_day_files():
+        rows = compact_day(day, force=args.force)
+        status = f"{rows} events" if rows else "skipped (already compacted or empty)"
+        print(f"{day}  {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,46 +1,129 @@
+import argparse
 import json
 import os
 from collections import Counter
 
+from scripts.compact_events import compacted_days, segment_files
+
 EVENT_DIR = os.getenv("EVENT_LOG_DIR", "/datalake/events")
+CHECKPOINT_PATH = os.getenv(
+    "METRICS_CHECKPOINT",
+    os.path.join(os.path.dirname(EVENT_DIR.rstrip("/")), "metrics_checkpoint.json"),
+)
+
+def count_new_lines(path, offset):
+    """Count events per (day, type) from `offset` on; stops before a trailing partial line."""
+    counts = Counter()
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            offset += len(raw)
+            line = raw.strip()
+            if not line:
+                continue
+            try:
+                e = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(e, dict):
+                continue
+            ts = e.get("ts")
+            counts[(ts[:10] if isinstance(ts, str) else "", e.get("type") or "")] += 1
+    return counts, offset
+
+def read_segment_counts(days):
+    """Count events per (day, type) from Parquet footers; no column data is read."""
+    import pyarrow.parquet as pq
+
+    counts = Counter()
+    for day in days:
+        for event_type, path in segment_files(day):
+            counts[(day, event_type)] += pq.ParquetFile(path).metadata.num_rows
+    return counts
+
+def encode_counts(counts):
+    return [[day, event_type, n] for (day, event_type), n in sorted(counts.items())]
+
+def decode_counts(rows):
+    return Counter({(day, event_type): n for day, event_type, n in rows})
+
+def load_checkpoint():
+    try:
+        with open(CHECKPOINT_PATH, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return {"files": {}}
+    if not isinstance(checkpoint.get("files"), dict):
+        return {"files": {}}
+    return checkpoint
+
+def save_checkpoint(checkpoint):
+    os.makedirs(os.path.dirname(CHECKPOINT_PATH) or ".", exist_ok=True)
+    tmp = f"{CHECKPOINT_PATH}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp, CHECKPOINT_PATH)
 
-def read_events():
-    if not os.path.isdir(EVENT_DIR):
-        return []
-    files = sorted([f for f in os.listdir(EVENT_DIR) if f.endswith(".jsonl")])
-    events = []
-    for fn in files:
+def update_checkpoint(checkpoint):
+    """Fold newly appended bytes of every day file into the per-file counts of `checkpoint`."""
+    files = checkpoint["files"]
+    segment_days = compacted_days()
+    names = set()
+    if os.path.isdir(EVENT_DIR):
+        names = {f for f in os.listdir(EVENT_DIR) if f.endswith(".jsonl")}
+    names |= {f"{day}.jsonl" for day in segment_days}
+
+    for fn in sorted(names):
         path = os.path.join(EVENT_DIR, fn)
-        with open(path, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    events.append(json.loads(line))
-                except Exception:
-                    pass
-    return events
+        day = fn[: -len(".jsonl")]
+        entry = files.get(fn)
+        if entry is None and day in segment_days:
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            files[fn] = {"offset": size, "counts": encode_counts(read_segment_counts([day]))}
+            continue
+        if not os.path.exists(path):
+            continue
+
+        size = os.path.getsize(path)
+        if entry is None or size < entry["offset"]:
+            # New file, or truncated/replaced since the last run: count it from the start.
+            entry = {"offset": 0, "counts": []}
+        if size > entry["offset"]:
+            new_counts, offset = count_new_lines(path, entry["offset"])
+            entry = {"offset": offset, "counts": encode_counts(decode_counts(entry["counts"]) + new_counts)}
+        files[fn] = entry
+    return checkpoint
 
 def main():
-    events = read_events()
-    if not events:
+    parser = argparse.ArgumentParser(description="Event counts over the datalake.")
+    parser.add_argument("--full", action="store_true", help="Ignore the checkpoint and rebuild it from all events")
+    args = parser.parse_args()
+
+    checkpoint = update_checkpoint({"files": {}} if args.full else load_checkpoint())
+    save_checkpoint(checkpoint)
+
+    counts = Counter()
+    for entry in checkpoint["files"].values():
+        counts.update(decode_counts(entry["counts"]))
+
+    if not counts:
         print(f"No events found in {EVENT_DIR}. Create some posts/comments first.")
         return
 
-    types = Counter(e.get("type") for e in events)
+    types = Counter()
     posts_by_day = Counter()
     comments_by_day = Counter()
 
-    for e in events:
-        ts = e.get("ts")
-        if not ts:
+    for (day, event_type), n in counts.items():
+        types[event_type or None] += n
+        if not day:
             continue
-        day = ts[:10]
-        if e.get("type") == "post_create":
-            posts_by_day[day] += 1
-        if e.get("type") == "comment_create":
-            comments_by_day[day] += 1
+        if event_type == "post_create":
+            posts_by_day[day] += n
+        if event_type == "comment_create":
+            comments_by_day[day] += n
 
     print("\n=== Event counts (all time) ===")
     for k, v in types.most_common():
@@ -55,4 +138,4 @@ def main():
         print(f"{day}  {comments_by_day[day]}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
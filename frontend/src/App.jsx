@@ -5,7 +5,7 @@ import {
   createPost,
   getProfile,
   listComments,
-  listCommunities,
+  listCommunityDirectory,
   listPosts,
   listUserCommunities,
   joinCommunity,
@@ -13,7 +13,10 @@ import {
   login,
   mediaUrl,
   presignMedia,
+  presignMediaBatch,
+  previewComments,
   register,
+  searchCommunities,
   updateCommunity,
   updateProfile,
   uploadMedia,
@@ -78,6 +81,20 @@ export default function App() {
     [posts, activePostId]
   );
 
+  useEffect(() => {
+    const prefix = communitySearch.trim();
+    if (!prefix) return undefined;
+    const timer = setTimeout(async () => {
+      const { items } = await searchCommunities(prefix);
+      setCommunities((prev) => {
+        const known = new Set(prev.map((community) => community.id));
+        const added = items.filter((community) => !known.has(community.id));
+        return added.length ? [...prev, ...added] : prev;
+      });
+    }, 200);
+    return () => clearTimeout(timer);
+  }, [communitySearch]);
+
   const filteredCommunities = useMemo(() => {
     const query = communitySearch.trim().toLowerCase();
     if (!query) return communities;
@@ -148,7 +165,7 @@ export default function App() {
   };
 
   const loadCommunities = async () => {
-    const list = await listCommunities();
+    const { items: list } = await listCommunityDirectory();
     setCommunities(list);
     if (list.length > 0 && !selectedCommunityId) {
       setSelectedCommunityId(list[0].id);
@@ -170,8 +187,17 @@ export default function App() {
       setPosts([]);
       return;
     }
-    const list = await listPosts(communityId);
-    setPosts(list);
+    const page = await listPosts(communityId);
+    setPosts(page.items);
+    if (page.items.length === 0) return;
+    const preview = await previewComments(page.items.map((post) => post.post_id));
+    setCommentLists((prev) => {
+      const next = { ...prev };
+      Object.entries(preview.items).forEach(([postId, { comments }]) => {
+        if (!next[postId] || next[postId].length <= comments.length) next[postId] = comments;
+      });
+      return next;
+    });
   };
 
   const handleCreateCommunity = async (event) => {
@@ -245,8 +271,8 @@ export default function App() {
   };
 
   const handleLoadComments = async (postId) => {
-    const list = await listComments(postId);
-    setCommentLists((prev) => ({ ...prev, [postId]: list }));
+    const page = await listComments(postId);
+    setCommentLists((prev) => ({ ...prev, [postId]: page.items }));
   };
 
   const handleCreateComment = async (postId, { parentId, body }) => {
@@ -273,21 +299,26 @@ export default function App() {
     if (missingKeys.length === 0) return;
 
     const updates = {};
-    for (const key of missingKeys) {
-      if (token) {
-        try {
-          const response = await presignMedia(token, key);
-          updates[key] = {
-            url: response.url,
-            contentType: response.content_type,
-          };
-        } catch (error) {
-          updates[key] = {
-            url: "",
-            contentType: "",
+    if (token) {
+      const emptyEntry = { url: "", contentType: "" };
+      try {
+        const response = await presignMediaBatch(token, missingKeys);
+        for (const item of response.items) {
+          updates[item.key] = {
+            url: item.url,
+            contentType: item.content_type,
           };
         }
-      } else {
+        for (const key of response.missing) {
+          updates[key] = emptyEntry;
+        }
+      } catch (error) {
+        for (const key of missingKeys) {
+          updates[key] = emptyEntry;
+        }
+      }
+    } else {
+      for (const key of missingKeys) {
         updates[key] = {
           url: mediaUrl(key),
           contentType: "",
@@ -37,6 +37,14 @@ export const login = (data) =>
 export const listCommunities = () =>
   fetch(`${API_BASE}/communities`).then(handleResponse);
 
+export const listCommunityDirectory = (cursor, limit = 100) =>
+  fetch(`${API_BASE}/communities/directory?limit=${limit}${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ""}`).then(
+    handleResponse
+  );
+
+export const searchCommunities = (prefix, limit = 20) =>
+  fetch(`${API_BASE}/communities/search?prefix=${encodeURIComponent(prefix)}&limit=${limit}`).then(handleResponse);
+
 export const createCommunity = (token, data) =>
   fetch(`${API_BASE}/communities`, {
     method: "POST",
@@ -57,8 +65,11 @@ export const updateCommunity = (token, communityId, data) =>
     body: JSON.stringify(data),
   }).then(handleResponse);
 
-export const listPosts = (communityId) =>
-  fetch(`${API_BASE}/communities/${communityId}/posts`).then(handleResponse);
+const cursorQuery = (cursor) =>
+  cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+
+export const listPosts = (communityId, cursor) =>
+  fetch(`${API_BASE}/communities/${communityId}/posts${cursorQuery(cursor)}`).then(handleResponse);
 
 export const createPost = (token, data) =>
   fetch(`${API_BASE}/posts`, {
@@ -70,8 +81,22 @@ export const createPost = (token, data) =>
     body: JSON.stringify(data),
   }).then(handleResponse);
 
-export const listComments = (postId) =>
-  fetch(`${API_BASE}/posts/${postId}/comments`).then(handleResponse);
+export const listComments = (postId, cursor) =>
+  fetch(`${API_BASE}/posts/${postId}/comments${cursorQuery(cursor)}`).then(handleResponse);
+
+export const previewComments = (postIds, limit = 3) =>
+  fetch(`${API_BASE}/posts/comments/preview`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ post_ids: postIds, limit }),
+  }).then(handleResponse);
+
+export const search = (q, { communityId, type = "all", cursor } = {}) => {
+  const params = new URLSearchParams({ q, type });
+  if (communityId) params.set("community_id", communityId);
+  if (cursor) params.set("cursor", cursor);
+  return fetch(`${API_BASE}/search?${params}`).then(handleResponse);
+};
 
 export const createComment = (token, data) =>
   fetch(`${API_BASE}/comments`, {
@@ -102,6 +127,16 @@ export const presignMedia = (token, key) =>
     },
   }).then(handleResponse);
 
+export const presignMediaBatch = (token, keys) =>
+  fetch(`${API_BASE}/media/presign/batch`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      ...authHeaders(token),
+    },
+    body: JSON.stringify({ keys }),
+  }).then(handleResponse);
+
 export const mediaUrl = (key) => `${API_BASE}/media/${key}`;
 
 export const getProfile = (token) =>
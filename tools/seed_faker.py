@@ -1,10 +1,32 @@
 #!/usr/bin/env python3
-
+"""Seed the API with fake users, communities and posts, or drive it with concurrent load.
+
+    python tools/seed_faker.py                 # serial seed (SEED_* env vars)
+    python tools/seed_faker.py load --vus 50 --duration 60 --rate 200 --ramp 15 \
+        --mix browse_feed=40,read_comments=30,comment=15,post=8,upload=2,register_login=5 \
+        --output load-results.json
+
+Load mode registers and logs in `--vus` asyncio virtual users, then runs scenarios picked by
+weight. Without `--rate` each user loops back to back (closed model), so throughput falls as
+latency rises. With `--rate` scenarios arrive on a fixed schedule whether or not earlier ones
+have finished (open model), each on a user that is not running another one; arrivals while all
+`--vus` users are busy are dropped and counted, never delayed. `--ramp` raises the rate,
+or staggers user start-up, linearly over that many seconds. The report has the achieved
+scenario rate next to the target (scenarios that issued no request, e.g. for want of a token,
+are counted as skipped instead), and throughput and p50/p95/p99 latency per endpoint;
+`--output` writes the same data as JSON for diffing between releases.
+"""
+
+import argparse
+import asyncio
+import json
 import os
+import platform
 import random
 import sys
 import time
-from typing import Any, Dict, List, Optional, Sequence
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set
 
 import requests
 from faker import Faker
@@ -16,6 +38,10 @@ USERS = int(os.getenv("SEED_USERS", "20"))
 COMMUNITIES = int(os.getenv("SEED_COMMUNITIES", "8"))
 POSTS = int(os.getenv("SEED_POSTS", "80"))
 
+LOAD_MIX = os.getenv(
+    "LOAD_MIX", "register_login=5,browse_feed=35,read_comments=30,post=10,comment=15,upload=5"
+)
+
 MAX_ATTEMPTS = int(os.getenv("SEED_MAX_ATTEMPTS", "5"))
 BACKOFF_SECONDS = float(os.getenv("SEED_BACKOFF_SECONDS", "0.6"))
 
@@ -307,5 +333,380 @@ def main() -> int:
     return 0
 
 
+class LoadStats:
+    """Per-endpoint latencies and status counts, keyed by "METHOD /route/{template}"."""
+
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.scenarios: Dict[str, int] = defaultdict(int)
+        self.dropped = 0
+        self.skipped = 0
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    def record(self, endpoint: str, status: str, seconds: float) -> None:
+        self.latencies[endpoint].append(seconds)
+        self.statuses[endpoint][status] += 1
+
+    def report(self) -> Dict[str, Any]:
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        endpoints = {}
+        for endpoint in sorted(self.latencies):
+            values = sorted(self.latencies[endpoint])
+            statuses = dict(self.statuses[endpoint])
+            errors = sum(n for status, n in statuses.items() if not status.startswith(("2", "3")))
+            endpoints[endpoint] = {
+                "requests": len(values),
+                "errors": errors,
+                "rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p95_ms": round(percentile(values, 95) * 1000, 2),
+                "p99_ms": round(percentile(values, 99) * 1000, 2),
+                "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+                "statuses": statuses,
+            }
+        total = sum(e["requests"] for e in endpoints.values())
+        return {
+            "duration_seconds": round(elapsed, 2),
+            "requests": total,
+            "errors": sum(e["errors"] for e in endpoints.values()),
+            "rps": round(total / elapsed, 2) if elapsed else 0.0,
+            "scenarios": dict(self.scenarios),
+            "scenarios_per_second": round(sum(self.scenarios.values()) / elapsed, 2) if elapsed else 0.0,
+            "dropped_arrivals": self.dropped,
+            "skipped_scenarios": self.skipped,
+            "endpoints": endpoints,
+        }
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise SystemExit("Scenario mix needs at least one positive weight")
+    return mix
+
+
+class RateLimiter:
+    """Hands out arrival times at `rate`/sec, ramping up over `ramp` seconds."""
+
+    def __init__(self, rate: float, ramp: float) -> None:
+        self.rate = rate
+        self.ramp = ramp
+        self.started = time.perf_counter()
+        self.next_at = self.started
+
+    def current_rate(self, now: float) -> float:
+        if self.ramp <= 0:
+            return self.rate
+        return max(self.rate * min(1.0, (now - self.started) / self.ramp), self.rate / 100)
+
+    async def wait(self) -> None:
+        """Sleep until the next arrival; a dispatcher that fell behind catches up rather than skipping slots."""
+        slot = self.next_at
+        self.next_at = slot + 1.0 / self.current_rate(slot)
+        delay = slot - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class VirtualUser:
+    def __init__(self, client: Any, stats: LoadStats, shared: Dict[str, Any]) -> None:
+        self.client = client
+        self.stats = stats
+        self.shared = shared
+        self.token: Optional[str] = None
+        self.joined: List[int] = []
+        self.requests = 0
+
+    async def call(self, method: str, endpoint: str, url: str, **kwargs: Any) -> Any:
+        headers = make_headers(self.token)
+        self.requests += 1
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=headers, **kwargs)
+            status = str(response.status_code)
+        except Exception as exc:  # network errors count against the endpoint, not the run
+            self.stats.record(f"{method} {endpoint}", type(exc).__name__, time.perf_counter() - start)
+            return None
+        self.stats.record(f"{method} {endpoint}", status, time.perf_counter() - start)
+        if response.status_code >= 400:
+            return None
+        try:
+            return response.json()
+        except ValueError:
+            return None
+
+    async def register_login(self) -> None:
+        username = f"{fake.user_name()}_{random.getrandbits(40):x}"
+        password = fake.password(length=12)
+        await self.call(
+            "POST", "/auth/register", "/auth/register",
+            json={"username": username, "email": f"{username}@example.com", "password": password},
+        )
+        data = await self.call("POST", "/auth/login", "/auth/login", json={"username": username, "password": password})
+        token = extract_token(data) if isinstance(data, dict) else None
+        # A failed switch keeps the previous identity rather than leaving the user token-less.
+        if token:
+            self.token = token
+            self.joined = []
+
+    async def join(self, community_id: int) -> None:
+        if community_id not in self.joined:
+            await self.call("POST", "/communities/{community_id}/join", f"/communities/{community_id}/join")
+            self.joined.append(community_id)
+
+    async def ensure_joined(self) -> Optional[int]:
+        if not self.token or not self.shared["communities"]:
+            return None
+        if not self.joined or random.random() < 0.1:
+            await self.join(pick(self.shared["communities"]))
+        return pick(self.joined)
+
+    def remember_posts(self, page: Any) -> None:
+        posts = self.shared["posts"]
+        for item in collect_items(page):
+            if item.get("post_id"):
+                posts.append((item["post_id"], item.get("community_id")))
+        del posts[: max(0, len(posts) - 5000)]
+
+    async def browse_feed(self) -> None:
+        if self.token:
+            self.remember_posts(await self.call("GET", "/feed", "/feed"))
+        if self.shared["communities"]:
+            community_id = pick(self.shared["communities"])
+            sort = random.choice(["new", "hot", "top"])
+            self.remember_posts(
+                await self.call("GET", "/communities/{community_id}/posts", f"/communities/{community_id}/posts", params={"sort": sort})
+            )
+
+    async def read_comments(self) -> None:
+        if not self.shared["posts"]:
+            return await self.browse_feed()
+        post_id, _ = pick(self.shared["posts"])
+        await self.call("GET", "/posts/{post_id}", f"/posts/{post_id}")
+        await self.call("GET", "/posts/{post_id}/comments/tree", f"/posts/{post_id}/comments/tree")
+
+    async def post(self) -> None:
+        community_id = await self.ensure_joined()
+        if community_id is None:
+            return
+        data = await self.call(
+            "POST", "/posts", "/posts",
+            json={"community_id": community_id, "title": fake.sentence(nb_words=8).rstrip("."), "body": fake.paragraph()},
+        )
+        if isinstance(data, dict) and data.get("post_id"):
+            self.shared["posts"].append((data["post_id"], community_id))
+
+    async def comment(self) -> None:
+        if not self.token or not self.shared["posts"]:
+            return
+        post_id, community_id = pick(self.shared["posts"])
+        if community_id is not None:
+            await self.join(community_id)
+        await self.call("POST", "/comments", "/comments", json={"post_id": post_id, "body": fake.sentence()})
+
+    async def upload(self) -> None:
+        if not self.token:
+            return
+        body = os.urandom(random.randint(4, 64) * 1024)
+        await self.call("POST", "/media/upload", "/media/upload", files={"file": ("load.png", body, "image/png")})
+
+
+SCENARIOS: Dict[str, Callable[[VirtualUser], Awaitable[None]]] = {
+    "register_login": VirtualUser.register_login,
+    "browse_feed": VirtualUser.browse_feed,
+    "read_comments": VirtualUser.read_comments,
+    "post": VirtualUser.post,
+    "comment": VirtualUser.comment,
+    "upload": VirtualUser.upload,
+}
+
+
+async def prepare_load(client: Any, stats: LoadStats, communities: int) -> Dict[str, Any]:
+    """Create a pool of communities (and learn existing ones) for the virtual users to work in."""
+    shared: Dict[str, Any] = {"communities": [], "posts": []}
+    owner = VirtualUser(client, stats, shared)
+    await owner.register_login()
+    for _ in range(communities):
+        name = f"{fake.word().capitalize()}{random.getrandbits(24):x}"
+        data = await owner.call("POST", "/communities", "/communities", json={"name": name, "description": fake.sentence()})
+        if isinstance(data, dict) and data.get("id") is not None:
+            shared["communities"].append(data["id"])
+    directory = await owner.call("GET", "/communities/directory", "/communities/directory", params={"limit": 100})
+    shared["communities"].extend(c["id"] for c in collect_items(directory) if c.get("id") not in shared["communities"])
+    return shared
+
+
+async def run_scenario(vu: VirtualUser, name: str) -> None:
+    """Run one scenario; it only counts towards the scenario rate if it issued a request."""
+    before = vu.requests
+    await SCENARIOS[name](vu)
+    if vu.requests > before:
+        vu.stats.scenarios[name] += 1
+    else:
+        vu.stats.skipped += 1
+
+
+async def run_virtual_user(vu: VirtualUser, mix: Dict[str, float], deadline: float, think: float) -> None:
+    """Closed model: the user starts its next scenario only when the previous one has finished."""
+    names, weights = list(mix), list(mix.values())
+    await vu.register_login()
+    while time.perf_counter() < deadline:
+        await run_scenario(vu, random.choices(names, weights)[0])
+        if think:
+            await asyncio.sleep(random.uniform(0, 2 * think))
+
+
+async def run_arrivals(
+    vus: List[VirtualUser],
+    mix: Dict[str, float],
+    duration: float,
+    limiter: RateLimiter,
+    stats: LoadStats,
+) -> None:
+    """Open model: start a scenario at every limiter slot, independent of how long earlier ones take.
+
+    Each scenario checks out an idle user for its whole run, so no two share a token or a joined
+    list mid-flight; an arrival that finds every user busy is dropped.
+    """
+    names, weights = list(mix), list(mix.values())
+    deadline = time.perf_counter() + duration
+    idle = list(vus)
+    tasks: Set[asyncio.Task] = set()
+
+    async def run_checked_out(vu: VirtualUser, name: str) -> None:
+        try:
+            await run_scenario(vu, name)
+        finally:
+            idle.append(vu)
+
+    while True:
+        await limiter.wait()
+        if time.perf_counter() >= deadline:
+            break
+        if not idle:
+            stats.dropped += 1
+            continue
+        task = asyncio.create_task(run_checked_out(idle.pop(), random.choices(names, weights)[0]))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    await asyncio.gather(*tasks)
+
+
+async def run_load(args: argparse.Namespace) -> Dict[str, Any]:
+    try:
+        import httpx
+    except ImportError:
+        raise SystemExit("Load mode needs httpx: pip install httpx")
+
+    mix = parse_mix(args.mix)
+    limits = httpx.Limits(max_connections=args.vus * 2, max_keepalive_connections=args.vus * 2)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        setup_stats = LoadStats()
+        shared = await prepare_load(client, setup_stats, args.communities)
+        if args.rate:
+            vus = [VirtualUser(client, setup_stats, shared) for _ in range(args.vus)]
+            await asyncio.gather(*(vu.register_login() for vu in vus))
+            stats = LoadStats()
+            for vu in vus:
+                vu.stats = stats
+            await run_arrivals(vus, mix, args.duration, RateLimiter(args.rate, args.ramp), stats)
+        else:
+            stats = LoadStats()
+            deadline = time.perf_counter() + args.duration
+
+            async def start_user(index: int) -> None:
+                if args.ramp:
+                    await asyncio.sleep(args.ramp * index / args.vus)
+                await run_virtual_user(VirtualUser(client, stats, shared), mix, deadline, args.think)
+
+            await asyncio.gather(*(start_user(i) for i in range(args.vus)))
+        stats.finished = time.perf_counter()
+
+    return {
+        "config": {
+            "base_url": args.base_url,
+            "vus": args.vus,
+            "duration_seconds": args.duration,
+            "model": "open" if args.rate else "closed",
+            "rate": args.rate,
+            "ramp_seconds": args.ramp,
+            "think_seconds": args.think,
+            "mix": mix,
+        },
+        "env": {"python": platform.python_version(), "host": platform.node(), "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z")},
+        **stats.report(),
+    }
+
+
+def print_load_report(result: Dict[str, Any]) -> None:
+    print(
+        f"\nLoad summary: {result['requests']} requests in {result['duration_seconds']}s "
+        f"({result['rps']} req/s, {result['errors']} errors)"
+    )
+    target = f"target {result['config']['rate']}/s, " if result["config"]["rate"] else ""
+    print(
+        f"Scenarios: {result['scenarios_per_second']}/s achieved ({target}{result['config']['model']} model, "
+        f"{result['dropped_arrivals']} dropped arrivals, {result['skipped_scenarios']} skipped)"
+    )
+    print(f"{'endpoint':<44}{'reqs':>8}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for endpoint, row in result["endpoints"].items():
+        print(
+            f"{endpoint:<44}{row['requests']:>8}{row['rps']:>9}{row['p50_ms']:>9}"
+            f"{row['p95_ms']:>9}{row['p99_ms']:>9}{row['errors']:>8}"
+        )
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="mode")
+    sub.add_parser("seed", help="serial seed (default)")
+    load = sub.add_parser("load", help="concurrent load generation")
+    load.add_argument("--base-url", default=BASE_URL)
+    load.add_argument(
+        "--vus", type=int, default=int(os.getenv("LOAD_VUS", "20")),
+        help="virtual users; in the open model also the most scenarios running at once",
+    )
+    load.add_argument("--duration", type=float, default=float(os.getenv("LOAD_DURATION", "30")), help="seconds")
+    load.add_argument("--rate", type=float, default=float(os.getenv("LOAD_RATE", "0")), help="scenario arrivals/sec, open model (0 = closed loop)")
+    load.add_argument("--ramp", type=float, default=float(os.getenv("LOAD_RAMP", "0")), help="ramp-up seconds")
+    load.add_argument("--think", type=float, default=float(os.getenv("LOAD_THINK", "0")), help="closed model: mean think time between scenarios")
+    load.add_argument("--mix", default=LOAD_MIX, help="scenario=weight,... from: " + ", ".join(SCENARIOS))
+    load.add_argument("--communities", type=int, default=int(os.getenv("LOAD_COMMUNITIES", "5")), help="communities created for the run")
+    load.add_argument("--timeout", type=float, default=30.0)
+    load.add_argument("--output", help="write the JSON report here ('-' for stdout)")
+    args = parser.parse_args(argv)
+    if args.mode == "load" and args.vus < 1:
+        parser.error("--vus must be at least 1")
+    return args
+
+
+def cli(argv: Sequence[str]) -> int:
+    args = parse_args(argv)
+    if args.mode != "load":
+        return main()
+    result = asyncio.run(run_load(args))
+    print_load_report(result)
+    if args.output == "-":
+        print(json.dumps(result, indent=2))
+    elif args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(result, fh, indent=2)
+        print(f"\nWrote {args.output}")
+    return 0
+
+
 if __name__ == "__main__":
-    raise SystemExit(main())
+    raise SystemExit(cli(sys.argv[1:]))